@@ -0,0 +1,99 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Build with `python build.py`; options after `--` are forwarded here from build.py
+import argparse
+import os
+import platform
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--onefile', action='store_true')
+parser.add_argument('--lean', action='store_true')
+options = parser.parse_args()
+
+system = platform.system().lower()
+
+# Standard library packages the game never imports at runtime
+LEAN_EXCLUDES = ['tkinter', 'unittest', 'pydoc', 'test', 'distutils',
+                 'setuptools', 'pkg_resources', 'pip', 'email', 'xml']
+
+# Add icon if it exists
+icon = None
+if system == 'windows' and os.path.exists('icon.ico'):
+    icon = 'icon.ico'
+elif system == 'darwin' and os.path.exists('icon.icns'):
+    icon = 'icon.icns'
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=LEAN_EXCLUDES if options.lean else [],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+if options.onefile:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='TheInversePath',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,  # Decompressing UPX-packed libraries would slow every launch
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+        icon=icon,
+    )
+    bundled = exe
+else:
+    # Folder builds start without unpacking to a temp dir
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='TheInversePath',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,  # Decompressing UPX-packed libraries would slow every launch
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+        icon=icon,
+    )
+    bundled = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,  # Decompressing UPX-packed libraries would slow every launch
+        upx_exclude=[],
+        name='TheInversePath',
+    )
+
+if system == 'darwin':
+    app = BUNDLE(
+        bundled,
+        name='TheInversePath.app',
+        icon=icon,
+        bundle_identifier=None,
+    )
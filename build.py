@@ -1,92 +1,232 @@
+import argparse
+import hashlib
+import importlib.metadata
+import json
+import mmap
 import os
 import platform
+import plistlib
 import subprocess
 import shutil
+import sys
 
-def compile_loading_window():
-    """Compile the loading window for macOS"""
-    if platform.system().lower() == 'darwin':
-        try:
-            # Compile the loading window as a universal binary
-            subprocess.run([
-                'clang',
-                'loading_window.m',
-                '-framework', 'Cocoa',
-                '-arch', 'x86_64',  # Intel support
-                '-arch', 'arm64',   # Apple Silicon support
-                '-o', 'loading_window'
-            ], check=True)
-            return True
-        except subprocess.CalledProcessError as e:
-            print("Failed to compile loading window:", e)
-            return False
-    return False
-
-def build_executable():
-    # Determine the system
-    system = platform.system().lower()
+# The platform being built for; PyInstaller only builds for the host
+SYSTEM = platform.system().lower()
+
+# Records the inputs of the last successful build so no-op rebuilds can be skipped
+BUILD_CACHE = '.build-cache.json'
+
+# Larger build inputs are hashed in chunks rather than mapped whole
+MMAP_HASH_LIMIT = 100 * 1024 * 1024
+
+# Installed packages whose versions change what ends up in the bundle
+BUILD_DEPENDENCIES = ('pygame', 'numpy', 'pyinstaller')
+
+def _spawn(cmd, **kwargs):
+    """Start a command through subprocess's posix_spawn fast path"""
+    # subprocess only uses posix_spawn for an executable given by path and with
+    # close_fds off; our own descriptors are non-inheritable anyway (PEP 446)
+    executable = shutil.which(cmd[0]) or cmd[0]
+    return subprocess.Popen([executable, *cmd[1:]], close_fds=False, **kwargs)
+
+def _run(cmd, check=True):
+    """Run a command to completion, raising on failure if check is set"""
+    proc = _spawn(cmd)
+    returncode = proc.wait()
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def compile_loading_window_async():
+    """Start compiling the loading window for macOS, returning the running process"""
+    if SYSTEM == 'darwin':
+        # Compile the loading window as a universal binary; compiler output is
+        # collected so it doesn't interleave with PyInstaller's log
+        return _spawn([
+            'clang',
+            '-Os', '-flto',     # Small, whole-program optimized binary
+            '-Wl,-dead_strip',  # Drop unreferenced code and data
+            'loading_window.m',
+            '-framework', 'Cocoa',
+            '-arch', 'x86_64',  # Intel support
+            '-arch', 'arm64',   # Apple Silicon support
+            '-o', 'loading_window'
+        ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return None
+
+def wait_for_loading_window(proc):
+    """Wait for the loading window compile to finish, raising if it failed"""
+    output, _ = proc.communicate()
+    if proc.returncode != 0:
+        print("Failed to compile loading window:")
+        print(output)
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, output)
     
+    # Strip local symbols to shrink what dyld has to map at launch
+    _run(['strip', '-x', 'loading_window'], check=False)
+
+def get_artifact_path(system, onefile=False):
+    """Get the path of the artifact PyInstaller produces for this system"""
+    if system == 'darwin':
+        return os.path.join('dist', 'TheInversePath.app')
+    # Folder builds put the executable inside dist/TheInversePath
+    base = 'dist' if onefile else os.path.join('dist', 'TheInversePath')
+    if system == 'windows':
+        return os.path.join(base, 'TheInversePath.exe')
+    return os.path.join(base, 'TheInversePath')
+
+def _dependency_version(name):
+    """Get the installed version of a package, or None if it isn't installed"""
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def _fingerprint(cmd, sources):
+    """Hash the build inputs together with the interpreter, platform, dependencies and PyInstaller command"""
+    digest = hashlib.blake2b()
+    for path in sources:
+        digest.update(path.encode())
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if 0 < size <= MMAP_HASH_LIMIT:
+                # Hash the mapped pages directly instead of copying into buffers
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    digest.update(m)
+            else:
+                for chunk in iter(lambda: f.read(64 * 1024), b''):
+                    digest.update(chunk)
+    digest.update(sys.version.encode())
+    digest.update(platform.platform().encode())
+    for name in BUILD_DEPENDENCIES:
+        digest.update(f'{name}=={_dependency_version(name)}'.encode())
+    digest.update(repr(tuple(cmd)).encode())
+    return digest.hexdigest()
+
+def _load_build_cache():
+    """Load the record of the last successful build, if any"""
+    try:
+        with open(BUILD_CACHE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_build_cache(digest, artifact):
+    """Remember the inputs and artifact of a successful build"""
+    with open(BUILD_CACHE, 'w') as f:
+        json.dump({digest: os.path.getmtime(artifact)}, f)
+
+# The spec file describing the bundle; build options are forwarded to it
+SPEC_FILE = 'TheInversePath.spec'
+
+def build_executable(full_rebuild=False, lean=False, onefile=False):
     # Base PyInstaller command
     cmd = [
         'pyinstaller',
-        '--onefile',
-        '--windowed',
-        '--name=TheInversePath',
-        '--clean',
-        '--add-data', f'sound_effects.py{os.pathsep}.',
-        '--add-data', f'music_generator.py{os.pathsep}.',
-        'main.py'
+        '--noconfirm',
+        f'--workpath=build/{SYSTEM}',  # Keep each platform's cached analysis apart
+        SPEC_FILE,
+        '--'
     ]
     
-    # Add icon if it exists
-    if system == 'windows' and os.path.exists('icon.ico'):
-        cmd.extend(['--icon=icon.ico'])
-    elif system == 'darwin' and os.path.exists('icon.icns'):
-        cmd.extend(['--icon=icon.icns'])
-        
-        # For macOS, compile the loading window
-        compile_loading_window()
+    # Options understood by the spec file
+    if onefile:
+        cmd.append('--onefile')
+    if lean:
+        # Keep unused packages out of the analysis graph and the bundle
+        cmd.append('--lean')
     
-    # Run PyInstaller
-    subprocess.run(cmd, check=True)
+    # A full rebuild discards PyInstaller's work directory and our own cache
+    if full_rebuild:
+        cmd.insert(1, '--clean')
+        shutil.rmtree('build', ignore_errors=True)
+        if os.path.exists(BUILD_CACHE):
+            os.remove(BUILD_CACHE)
     
-    if system == 'darwin':
+    # Look up the project files in a single directory scan
+    entries = {entry.name for entry in os.scandir('.') if entry.is_file()}
+    game_modules = sorted(name for name in entries
+                          if name.endswith('.py') and name != 'build.py')
+    
+    # Files whose contents determine the build output
+    sources = [SPEC_FILE, *game_modules]
+    
+    # The spec file picks up the icon if it exists
+    if SYSTEM == 'windows' and 'icon.ico' in entries:
+        sources.append('icon.ico')
+    elif SYSTEM == 'darwin' and 'icon.icns' in entries:
+        sources.append('icon.icns')
+    # Only single-file builds are slow enough to start to need the loading window
+    use_loading_window = SYSTEM == 'darwin' and onefile
+    if use_loading_window:
+        sources.append('loading_window.m')
+    
+    # Skip the build entirely if nothing changed since the last successful one
+    artifact = get_artifact_path(SYSTEM, onefile)
+    digest = _fingerprint(cmd, sources)
+    recorded_mtime = _load_build_cache().get(digest)
+    if recorded_mtime is not None and os.path.exists(artifact) \
+            and os.path.getmtime(artifact) == recorded_mtime:
+        print(f"{artifact} is up-to-date")
+        return
+    
+    # For macOS, compile the loading window while PyInstaller runs
+    loading_window_proc = compile_loading_window_async() if use_loading_window else None
+    
+    # Run PyInstaller, always reaping the loading window compile: it is
+    # checked once PyInstaller succeeds, and killed if PyInstaller fails
+    pyinstaller_succeeded = False
+    try:
+        _run(cmd)
+        pyinstaller_succeeded = True
+    finally:
+        if loading_window_proc is not None:
+            if pyinstaller_succeeded:
+                wait_for_loading_window(loading_window_proc)
+            else:
+                loading_window_proc.kill()
+                loading_window_proc.communicate()
+    
+    if use_loading_window:
         # For macOS, we need to modify the generated app to show the loading window
         app_path = 'dist/TheInversePath.app'
         if os.path.exists(app_path):
             macos_path = os.path.join(app_path, 'Contents/MacOS')
             
-            # Copy the loading window binary to the app bundle
+            # Link the loading window binary into the app bundle (it is
+            # already executable, so the link needs no chmod)
             if os.path.exists('loading_window'):
-                shutil.copy2('loading_window', os.path.join(macos_path, 'loading_window'))
-                os.chmod(os.path.join(macos_path, 'loading_window'), 0o755)
+                loading_window_path = os.path.join(macos_path, 'loading_window')
+                try:
+                    os.link('loading_window', loading_window_path)
+                except OSError:
+                    # Fall back to copying across filesystems or over a stale binary
+                    shutil.copy2('loading_window', loading_window_path)
             else:
                 print("Warning: loading_window binary not found!")
                 return
             
-            # Create the wrapper script
-            wrapper_script = '''#!/bin/bash
-DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
-"$DIR/loading_window" & # Start loading window
-"$DIR/TheInversePath.bin" # Start main app
-'''
-            # Save the wrapper script
-            with open('dist/wrapper.sh', 'w') as f:
-                f.write(wrapper_script)
-            os.chmod('dist/wrapper.sh', 0o755)
-            
-            # Move the original executable
-            os.rename(
-                os.path.join(macos_path, 'TheInversePath'),
-                os.path.join(macos_path, 'TheInversePath.bin')
-            )
-            
-            # Move the wrapper script to be the main executable
-            shutil.move('dist/wrapper.sh', os.path.join(macos_path, 'TheInversePath'))
+            # Launch through the loading window, which spawns the game itself
+            plist_path = os.path.join(app_path, 'Contents', 'Info.plist')
+            with open(plist_path, 'rb') as f:
+                info = plistlib.load(f)
+            info['CFBundleExecutable'] = 'loading_window'
+            with open(plist_path + '.new', 'wb') as f:
+                f.write(plistlib.dumps(info))
+            os.replace(plist_path + '.new', plist_path)
             
             print("Successfully added loading window to macOS app!")
     
-    print(f"\nBuild completed for {system}!")
+    _save_build_cache(digest, artifact)
+    print(f"\nBuild completed for {SYSTEM}!")
 
 if __name__ == '__main__':
-    build_executable() 
+    parser = argparse.ArgumentParser(description='Build The Inverse Path executable')
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help='discard cached build state and rebuild from scratch')
+    parser.add_argument('--lean', action='store_true',
+                        help='exclude unused standard library packages from the bundle')
+    parser.add_argument('--onefile', action='store_true',
+                        help='build a single self-extracting executable instead of a folder')
+    args = parser.parse_args()
+    build_executable(full_rebuild=args.full_rebuild, lean=args.lean, onefile=args.onefile)
+
@@ -1,4 +1,13 @@
 #import <Cocoa/Cocoa.h>
+#include <mach-o/dyld.h>
+#include <spawn.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+extern char **environ;
+
+// The game process started by this launcher
+static pid_t gamePid = 0;
 
 @interface LoadingWindowController : NSWindowController
 @property (strong) NSProgressIndicator *progressIndicator;
@@ -61,13 +70,40 @@
         [[NSFileManager defaultManager] removeItemAtPath:readyPath error:nil];
         // Quit the app
         [NSApp terminate:nil];
+    } else if (waitpid(gamePid, NULL, WNOHANG) != 0) {
+        // The game exited before signalling ready
+        [NSApp terminate:nil];
     }
 }
 
 @end
 
+// Start the game binary that sits next to this launcher in Contents/MacOS
+static void spawnGame(void) {
+    char path[PATH_MAX];
+    uint32_t size = sizeof(path);
+    if (_NSGetExecutablePath(path, &size) != 0) {
+        return;
+    }
+    char *slash = strrchr(path, '/');
+    if (slash == NULL || (size_t)(slash - path) + sizeof("/TheInversePath") > sizeof(path)) {
+        return;
+    }
+    strcpy(slash, "/TheInversePath");
+    
+    char *gameArgv[] = { path, NULL };
+    if (posix_spawn(&gamePid, path, NULL, NULL, gameArgv, environ) != 0) {
+        gamePid = 0;
+    }
+}
+
 int main(int argc, const char * argv[]) {
     @autoreleasepool {
+        spawnGame();
+        if (gamePid == 0) {
+            return 1;
+        }
+        
         NSApplication *app = [NSApplication sharedApplication];
         LoadingWindowController *controller = [[LoadingWindowController alloc] init];
         [controller showWindow:nil];
@@ -3,12 +3,14 @@ import platform
 import subprocess
 import sys
 import pygame
-import noise
+import numpy as np
 import random
-from music_generator import MusicGenerator
+from collections import Counter, deque
+import perlin
+from music_generator import MusicGenerator, SONG_END_EVENT
 from sound_effects import SoundEffects
-from threading import Thread, Event
 import math
+from array import array
 import atexit
 import signal
 
@@ -93,6 +95,8 @@ BLUE = (100, 150, 255)
 PORTAL_COLORS = [(100, 150, 255), (150, 200, 255)]
 GREY = (128, 128, 128)
 GRID_COLOR = (50, 50, 50)
+# Stands in for transparency on the grid line overlay
+GRID_LINES_KEY = (255, 0, 255)
 
 # New color constants for effects
 PLAYER_GLOW = (255, 150, 150, 100)
@@ -104,6 +108,12 @@ INDICATOR_LENGTH = CELL_SIZE * 0.6
 INDICATOR_WIDTH = 3
 INDICATOR_COLOR = (255, 200, 200, 160)
 INDICATOR_HEAD_SIZE = 6
+# The arrow head's sides are the line direction turned by this angle
+INDICATOR_HEAD_ANGLE = math.pi / 6
+INDICATOR_HEAD_COS = math.cos(INDICATOR_HEAD_ANGLE)
+INDICATOR_HEAD_SIN = math.sin(INDICATOR_HEAD_ANGLE)
+# Half the size of the square around the player the indicator fits in
+INDICATOR_REACH = math.ceil(INDICATOR_LENGTH) + INDICATOR_WIDTH + 2
 
 # Game over text colors
 GAME_OVER_COLOR = (255, 50, 50)
@@ -118,6 +128,13 @@ INVALID_MOVE_COLOR = (255, 100, 100, 40)
 MOVEMENT_LOCK_COLOR = (255, 200, 50, 100)
 MOVEMENT_LOCK_BORDER = (255, 200, 50)
 
+# Grid steps to the four neighbouring cells
+NEIGHBOR_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+# Events telling us the OS may have damaged what the window shows
+WINDOW_REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                         pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
 # Game over states
 DEATH_CRUSHED = "You've been smooshed!"
 DEATH_TRAPPED = "You're trapped!"
@@ -154,36 +171,176 @@ DEFAULT_KEYS = {
     "pause": pygame.K_ESCAPE
 }
 
-class FallingBlock:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.y_velocity = 0
-        self.falling = True
-        self.size = PLAYER_SIZE
-        # Add a small random initial delay to stagger the falling
-        self.fall_delay = random.randint(0, 30)
-
-    def should_start_falling(self):
-        if self.fall_delay > 0:
-            self.fall_delay -= 1
-            return False
-        return True
+# Sine table for animations, one full turn over TRIG_STEPS entries
+TRIG_STEPS = 1024
+_SIN = array('d', [math.sin(i * 2 * math.pi / TRIG_STEPS) for i in range(TRIG_STEPS)])
+
+def _sin(angle):
+    """Look up the sine of an angle in radians from the table"""
+    return _SIN[round(angle * (TRIG_STEPS / (2 * math.pi))) & (TRIG_STEPS - 1)]
+
+def _cos(angle):
+    """Look up the cosine of an angle in radians from the table"""
+    return _SIN[(round(angle * (TRIG_STEPS / (2 * math.pi))) + TRIG_STEPS // 4) & (TRIG_STEPS - 1)]
+
+def _cell_area_rects(reach):
+    """Get the screen rect reaching `reach` cells around each cell, indexed [x][y]"""
+    size = CELL_SIZE * (reach * 2 + 1)
+    return [[pygame.Rect((x - reach) * CELL_SIZE, (y - reach) * CELL_SIZE, size, size)
+             for y in range(GRID_SIZE)]
+            for x in range(GRID_SIZE)]
+
+# Half-brightness versions of the colors disabled text has been drawn in
+_dimmed_colors = {}
+
+def _dim(color):
+    """Get a color at half brightness, keeping any alpha"""
+    dimmed = _dimmed_colors.get(color)
+    if dimmed is None:
+        dimmed = tuple(c // 2 for c in color[:3]) + tuple(color[3:])
+        _dimmed_colors[color] = dimmed
+    return dimmed
+
+def _step_blocks(active, xs, ys, new_ys, y_velocities, falling, blocked,
+                 player_x, player_y, game_over):
+    """Move the active blocks, returning (landings, blocks_moved, check_trapped, crushed)"""
+    # Runs every frame, so it works on plain lists held in local variables
+    # and updates ys, y_velocities and falling in place; blocked is the
+    # blocked-cell mask as bytes indexed [x * GRID_SIZE + y]
+    landed = 0
+    blocks_moved = False
+    check_trapped = False
+    crushed = False
+    size = GRID_SIZE
+    bottom = size - 1
+    
+    # Number of blocks in each (x, row) cell, kept up to date as blocks move
+    # so that checking for a block in a cell is a single lookup and each
+    # block sees where the others have already got to this frame
+    occupied = Counter(zip(xs, map(int, ys)))
+    
+    for i in active:
+        # Store previous position
+        prev_y = ys[i]
+        prev_grid_y = int(prev_y)
+        new_y = new_ys[i]
+
+        # Convert to grid coordinates
+        grid_y = int(new_y)
+        grid_x = xs[i]
+        
+        # Take this block out of its cell while it moves
+        occupied[grid_x, prev_grid_y] -= 1
+        
+        # Check if block would hit bottom of screen
+        if grid_y >= bottom:
+            # The block wraps to the top unless the top cell is blocked by the
+            # grid or by another block, in which case it stops at the bottom
+            if blocked[grid_x * size] or occupied[grid_x, 0]:
+                ys[i] = bottom
+                falling[i] = False
+                landed += 1
+            else:
+                ys[i] = 0
+            occupied[grid_x, int(ys[i])] += 1
+            y_velocities[i] = 0
+            blocks_moved = True
+            continue
+
+        # Check if block would hit a blocking color
+        if grid_y + 1 < size and blocked[grid_x * size + grid_y + 1]:
+            ys[i] = grid_y
+            occupied[grid_x, grid_y] += 1
+            falling[i] = False
+            y_velocities[i] = 0
+            landed += 1
+            blocks_moved = True
+            # Check if block landed adjacent to player
+            if abs(grid_x - player_x) + abs(grid_y - player_y) == 1:
+                check_trapped = True
+            continue
+
+        # Check for collision with player (if not already in game over)
+        if not game_over and (grid_x == player_x and 
+            (grid_y + 1 == player_y or 
+             (grid_y < player_y and new_y + 1 > player_y))):
+            # Block has landed on player; still update its position for visual consistency
+            game_over = crushed = True
+            ys[i] = grid_y
+            occupied[grid_x, grid_y] += 1
+            falling[i] = False
+            y_velocities[i] = 0
+            landed += 1
+            blocks_moved = True
+            continue
+
+        # Check for collision with another block in the cell below; since
+        # blocks move less than a cell per frame, that is the only row one
+        # could be in that this block would reach
+        if occupied[grid_x, grid_y + 1]:
+            ys[i] = grid_y
+            occupied[grid_x, grid_y] += 1
+            falling[i] = False
+            y_velocities[i] = 0
+            landed += 1
+            blocks_moved = True
+            # Check if block landed adjacent to player
+            if abs(grid_x - player_x) + abs(grid_y - player_y) == 1:
+                check_trapped = True
+        else:
+            ys[i] = new_y
+            occupied[grid_x, grid_y] += 1
+            if grid_y != prev_grid_y:
+                blocks_moved = True
+                # If block moved through a position adjacent to player, check if we need to check trapped
+                if (abs(grid_x - player_x) + abs(prev_grid_y - player_y) == 1 or 
+                    abs(grid_x - player_x) + abs(grid_y - player_y) == 1):
+                    check_trapped = True
+    
+    return landed, blocks_moved, check_trapped, crushed
 
 class Game:
     def __init__(self):
         self.screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
         # Create surfaces for transitions
-        self.transition_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        self.level_transition_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+        self.transition_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA).convert_alpha()
+        self.level_transition_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE)).convert()
+        # Contrast preview tint, refilled only when its alpha changes
+        self.preview_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA).convert_alpha()
+        self._preview_surface_alpha = None
+        # Scratch surfaces for overlay effects, redrawn every frame
+        self._cell_overlay = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA).convert_alpha()
+        self._screen_overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA).convert_alpha()
+        # Cell outlines, which are the same for every grid
+        self._grid_lines = self.render_grid_lines()
+        # Screen areas that changed last frame, when only those were updated,
+        # and the grid surface that was drawn under them
+        self._dirty_rects = None
+        self._shown_grid_surface = None
+        # What the menu on screen was drawn from, while a menu is showing
+        self._shown_menu_key = None
+        # The player's glow and indicators stay within its neighbouring cells,
+        # and the portal's glow within two cells of it, so the screen area
+        # each can touch is worked out once for every cell
+        self._player_areas = _cell_area_rects(1)
+        self._portal_areas = _cell_area_rects(2)
         pygame.display.set_caption("The Inverse Path")
         self.clock = pygame.time.Clock()
         
+        # Only queue the events the game handles, so mouse motion and other
+        # window events never pile up in the queue drained each frame
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, SONG_END_EVENT,
+                                  *WINDOW_REPAINT_EVENTS])
+        
         # Menu state
         self.menu_state = MENU_INTRO
         self.previous_menu = None
         self.selected_menu_item = 0
         self.keybindings = DEFAULT_KEYS.copy()
+        self.update_direction_table()
+        self.update_keybind_labels()
+        self.update_key_actions()
         self.waiting_for_key = None
         
         # Volume settings (initialize before sound systems)
@@ -195,8 +352,6 @@ class Game:
         # Initialize sound systems
         self.sound_effects = SoundEffects()
         self.music_gen = MusicGenerator()
-        self.music_thread = None
-        self.music_stop_event = Event()
         
         # Menu fonts
         self.title_font = pygame.font.Font(None, 84)
@@ -210,12 +365,32 @@ class Game:
         self.level_announcement_font = pygame.font.Font(None, 72)
         self.level_announcement_small_font = pygame.font.Font(None, 36)
         
+        # Rendered text surfaces, keyed by (font, text, color), and their
+        # rects centered on a point, keyed by (font, text, color, center)
+        self._text_cache = {}
+        self._text_rects = {}
+        self._glow_cache = {}
+        self._particle_glyphs = {}
+        self._portal_cache = {}
+        self._portal_frame = (None, None)
+        self._indicator_surface = pygame.Surface((INDICATOR_REACH * 2, INDICATOR_REACH * 2),
+                                                 pygame.SRCALPHA).convert_alpha()
+        
+        # Menu backdrop, the grid it was last composited over, and each menu's
+        # laid out items keyed by everything that affects them, so a menu is
+        # only laid out again once it changes
+        self._menu_bg = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA).convert_alpha()
+        self._menu_bg.fill(MENU_BG)
+        self._menu_backdrop = (None, None)
+        self._menu_plans = {}
+        
         # Game state
         self.level = 1
         self.colors_inverted = False
-        self.falling_blocks = []
+        self.set_falling_blocks([], [], [])
         self.movement_delay = 0
         self.movement_cooldown = 10
+        self._moves_made = False
         
         # Block count scaling
         self.BASE_BLOCKS = 7 
@@ -244,8 +419,23 @@ class Game:
         # Spawn animation variables
         self.spawn_animation_duration = 60
         self.spawn_animation_timer = 0
+        self.spawn_ring_delays = [i * 15 for i in range(3)]
         self.spawn_rings = []
         
+        # The rings look the same on every spawn, so every frame is drawn up front
+        self._spawn_frames = self.render_spawn_frames()
+        
+        # The lock and danger indicators never change, so they are drawn once
+        self.render_indicator_surfaces()
+        
+        # Blocks all look the same, so they are blitted from a single sprite
+        self._block_sprite = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE), pygame.SRCALPHA).convert_alpha()
+        self.draw_rounded_rect(self._block_sprite, BLOCK_COLOR, self._block_sprite.get_rect(), 5)
+        
+        # Danger indicator blits, and the state they were worked out for
+        self._danger_key = None
+        self._danger_blits = []
+        
         # Gameplay constants
         self.MIN_START_DISTANCE = GRID_SIZE // 2
         
@@ -255,7 +445,7 @@ class Game:
         self.game_over_reason = ""
         self.death_animation_timer = 0
         self.death_animation_duration = 60
-        self.death_particles = []
+        self.set_death_particles([], [], [], [], [])
         
         # Preview state for contrast switch
         self.showing_contrast_preview = False
@@ -274,39 +464,26 @@ class Game:
         signal_loading_complete()
 
     def start_background_music(self):
-        """Start playing music in a background thread"""
-        if self.music_thread is not None:
-            self.music_stop_event.set()
-            self.music_thread.join()
-            self.music_stop_event.clear()
-        
+        """Start playing music; the next song is started when SONG_END_EVENT arrives"""
         # Set initial volume
         self.music_gen.set_volume(self.music_volume)
         self.music_gen.set_muted(self.music_muted)
         
-        def music_loop():
-            while not self.music_stop_event.is_set():
-                self.music_gen.play_song()
-        
-        self.music_thread = Thread(target=music_loop, daemon=True)
-        self.music_thread.start()
+        self.music_gen.play_song()
+
+    def is_music_playing(self):
+        """Check whether a song is currently being played"""
+        song_thread = getattr(self.music_gen, 'song_thread', None)
+        return song_thread is not None and song_thread.is_alive()
 
     def find_safe_position(self):
         """Find a safe position for the player that won't result in immediate death"""
         # Try all positions on the grid
         for x in range(GRID_SIZE):
             for y in range(GRID_SIZE):
-                if self.grid[x][y] != self.colors_inverted and self.is_position_safe_from_blocks(x, y):
+                if not self._blocked_bytes[x * GRID_SIZE + y] and self.is_position_safe_from_blocks(x, y):
                     # Check if this position has at least one valid move
-                    has_valid_move = False
-                    for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                        new_x = x + dx
-                        new_y = y + dy
-                        if self.will_position_be_valid(new_x, new_y, self.endpoint):
-                            has_valid_move = True
-                            break
-                    
-                    if has_valid_move:
+                    if self.has_valid_neighbor(x, y, self.endpoint):
                         return [x, y]
         return None
 
@@ -315,6 +492,9 @@ class Game:
         max_attempts = 10
         valid_layout = False
         
+        # The block count only depends on the level, so work it out once per layout
+        self._block_count = self.get_block_count_for_level()
+        
         while not valid_layout and attempts < max_attempts:
             # Generate new level
             self.generate_grid()
@@ -351,19 +531,15 @@ class Game:
                 self.player_pos = list(player_pos)
                 self.endpoint = endpoint_pos
                 # Create falling blocks with reduced count and higher initial positions
-                self.falling_blocks = []
                 reduced_blocks = INITIAL_BLOCKS // 3
-                for _ in range(reduced_blocks):
-                    x = random.randint(0, GRID_SIZE-1)
-                    y = random.uniform(0, 2)  # Start blocks higher up
-                    block = FallingBlock(x, y)
-                    block.fall_delay = random.randint(60, 120)  # Longer delays
-                    self.falling_blocks.append(block)
+                self.set_falling_blocks(np.random.randint(0, GRID_SIZE, reduced_blocks),
+                                        np.random.uniform(0, 2, reduced_blocks),  # Start blocks higher up
+                                        np.random.randint(60, 121, reduced_blocks))  # Longer delays
             else:
                 # Last resort: just place them randomly with minimal blocks
                 self.place_player_old()
                 self.place_endpoint_old()
-                self.falling_blocks = []
+                self.set_falling_blocks([], [], [])
         
         # Only start spawn animation immediately for the first level
         if self.is_first_level:
@@ -385,50 +561,84 @@ class Game:
         self.spawn_animation_timer = self.spawn_animation_duration
         self.spawn_rings = []
         # Create 3 rings that will expand outward
-        for i in range(3):
+        for delay in self.spawn_ring_delays:
             self.spawn_rings.append({
-                'delay': i * 15,
+                'delay': delay,
                 'radius': 0,
                 'alpha': 255
             })
 
+    def render_spawn_frames(self):
+        """Pre-render the spawn rings for each tick of the animation, centered on their surfaces"""
+        frames = []
+        for timer in range(self.spawn_animation_duration, 0, -1):
+            # Calculate ring properties
+            rings = []
+            for delay in self.spawn_ring_delays:
+                if timer < delay:
+                    continue
+                time_since_start = self.spawn_animation_duration - timer + delay
+                alpha = max(0, 255 - (time_since_start * 4))
+                if alpha > 0:
+                    rings.append((int(time_since_start * 1.5), alpha))
+            
+            # Make the frame just big enough for its largest ring
+            radius = max((ring_radius for ring_radius, _ in rings), default=0)
+            frame = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA).convert_alpha()
+            for ring_radius, alpha in rings:
+                pygame.draw.circle(frame, (*RED[:3], alpha), (radius, radius), ring_radius, 2)
+            frames.append(frame)
+        return frames
+
+    def render_indicator_surfaces(self):
+        """Pre-render the movement lock, danger and invalid move cell indicators"""
+        # Lock indicator: filled cell with a border and crossed lines
+        self._lock_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.rect(self._lock_surface, MOVEMENT_LOCK_COLOR,
+                        (0, 0, CELL_SIZE, CELL_SIZE))
+        pygame.draw.rect(self._lock_surface, MOVEMENT_LOCK_BORDER,
+                        (0, 0, CELL_SIZE, CELL_SIZE), 2)
+        arrow_length = CELL_SIZE // 4
+        center_x = CELL_SIZE // 2
+        center_y = CELL_SIZE // 2
+        for offset in [-arrow_length, arrow_length]:
+            pygame.draw.line(self._lock_surface, MOVEMENT_LOCK_BORDER,
+                           (center_x + offset, center_y - arrow_length),
+                           (center_x + offset, center_y + arrow_length), 2)
+            pygame.draw.line(self._lock_surface, MOVEMENT_LOCK_BORDER,
+                           (center_x - arrow_length, center_y + offset),
+                           (center_x + arrow_length, center_y + offset), 2)
+        
+        # Danger indicator: filled cell with a border
+        self._danger_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.rect(self._danger_surface, DANGER_COLOR,
+                       (0, 0, CELL_SIZE, CELL_SIZE))
+        pygame.draw.rect(self._danger_surface, DANGER_BORDER,
+                       (0, 0, CELL_SIZE, CELL_SIZE), 2)
+        
+        # Invalid move indicator: faint filled cell
+        self._invalid_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.rect(self._invalid_surface, INVALID_MOVE_COLOR,
+                       (0, 0, CELL_SIZE, CELL_SIZE))
+
     def draw_spawn_animation(self, surface):
         """Draw the spawn animation effect"""
         if self.spawn_animation_timer > 0:
             player_center_x = self.player_pos[0] * CELL_SIZE + CELL_SIZE // 2
             player_center_y = self.player_pos[1] * CELL_SIZE + CELL_SIZE // 2
             
-            # Create a surface for the rings
-            ring_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-            
-            # Update and draw each ring
-            for ring in self.spawn_rings:
-                if self.spawn_animation_timer < ring['delay']:
-                    continue
-                
-                # Calculate ring properties
-                time_since_start = self.spawn_animation_duration - self.spawn_animation_timer + ring['delay']
-                ring['radius'] = int(time_since_start * 1.5)
-                ring['alpha'] = max(0, 255 - (time_since_start * 4))
-                
-                # Draw the ring
-                if ring['alpha'] > 0:
-                    ring_color = (*RED[:3], ring['alpha'])
-                    pygame.draw.circle(ring_surface, ring_color,
-                                    (player_center_x, player_center_y),
-                                    ring['radius'], 2)
-            
             # Draw highlight in player's cell
             cell_alpha = min(100, self.spawn_animation_timer * 2)
-            cell_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(cell_surface, (*RED[:3], cell_alpha),
-                           (0, 0, CELL_SIZE, CELL_SIZE))
+            cell_surface = self._cell_overlay
+            cell_surface.fill((*RED[:3], cell_alpha))
             surface.blit(cell_surface,
                         (self.player_pos[0] * CELL_SIZE,
                          self.player_pos[1] * CELL_SIZE))
             
-            # Draw the rings
-            surface.blit(ring_surface, (0, 0))
+            # Draw this tick's pre-rendered rings centered on the player
+            ring_surface = self._spawn_frames[self.spawn_animation_duration - self.spawn_animation_timer]
+            radius = ring_surface.get_width() // 2
+            surface.blit(ring_surface, (player_center_x - radius, player_center_y - radius))
             
             # Update timer
             self.spawn_animation_timer -= 1
@@ -441,27 +651,24 @@ class Game:
     def create_falling_blocks(self):
         """Create initial falling blocks, ensuring they don't trap the player"""
         max_attempts = 10
+        # Block count for current level, worked out once in reset_game
+        block_count = self._block_count
+        
         for attempt in range(max_attempts):
-            self.falling_blocks = []
             blocks_valid = True
             
-            # Get block count for current level
-            block_count = self.get_block_count_for_level()
+            # Try to place blocks, drawing all their random values at once;
+            # initially distribute blocks randomly throughout the map
+            xs = np.random.randint(0, GRID_SIZE, block_count)
+            ys = np.random.uniform(0, GRID_SIZE-1, block_count)
             
-            # Try to place blocks
-            for _ in range(block_count):
-                x = random.randint(0, GRID_SIZE-1)
-                # Initially distribute blocks randomly throughout the map
-                y = random.uniform(0, GRID_SIZE-1)
-                
-                # Don't place blocks directly above player or endpoint
-                if x == self.player_pos[0] or x == self.endpoint[0]:
-                    y = max(y, max(self.player_pos[1], self.endpoint[1]) + 2)
-                
-                block = FallingBlock(x, y)
-                # Randomize initial fall delays more widely for initial distribution
-                block.fall_delay = random.randint(0, 60)
-                self.falling_blocks.append(block)
+            # Don't place blocks directly above player or endpoint
+            above = (xs == self.player_pos[0]) | (xs == self.endpoint[0])
+            ys[above] = np.maximum(ys[above], max(self.player_pos[1], self.endpoint[1]) + 2)
+            
+            # Randomize initial fall delays more widely for initial distribution
+            fall_delays = np.random.randint(0, 61, block_count)
+            self.set_falling_blocks(xs, ys, fall_delays)
             
             # Verify this block configuration doesn't trap the player
             if not self.check_player_trapped():
@@ -471,174 +678,151 @@ class Game:
             blocks_valid = False
         
         # If we couldn't find a valid configuration, place fewer blocks
-        self.falling_blocks = []
         reduced_blocks = block_count // 2
-        for _ in range(reduced_blocks):
-            x = random.randint(0, GRID_SIZE-1)
-            # Place blocks higher up to give more time for player to move
-            y = random.uniform(0, 2)
-            block = FallingBlock(x, y)
-            block.fall_delay = random.randint(30, 90)
-            self.falling_blocks.append(block)
-
-    def simulate_block_landing(self, block):
-        """Simulate where a block will land"""
-        test_y = block.y
-        while test_y < GRID_SIZE - 1:
-            next_y = int(test_y) + 1
-            # Stop if hitting a blocking color
-            if self.grid[int(block.x)][next_y] == self.colors_inverted:
-                break
-            # Stop if hitting another block
-            block_collision = False
-            for other_block in self.falling_blocks:
-                if other_block != block and int(other_block.x) == int(block.x) and int(other_block.y) == next_y:
-                    block_collision = True
-                    break
-            if block_collision:
-                break
-            test_y = next_y
-        return int(test_y)
-
-    def will_block_fall_here(self, x, y):
+        self.set_falling_blocks(np.random.randint(0, GRID_SIZE, reduced_blocks),
+                                # Place blocks higher up to give more time for player to move
+                                np.random.uniform(0, 2, reduced_blocks),
+                                np.random.randint(30, 91, reduced_blocks))
+
+    def set_falling_blocks(self, xs, ys, fall_delays):
+        """Replace the falling blocks, each starting to fall after its own delay"""
+        # Block state is kept as parallel arrays, one entry per block
+        self.block_x = np.array(xs, dtype=np.intp)
+        self.block_y = np.array(ys, dtype=np.float64)
+        self.block_vy = np.zeros(len(self.block_x))
+        self.block_falling = np.ones(len(self.block_x), dtype=bool)
+        self.block_fall_delay = np.array(fall_delays, dtype=np.intp)
+        
+        # Blocks never change column, so the column index only changes with the blocks
+        self._blocks_by_col = {}
+        for i, x in enumerate(self.block_x.tolist()):
+            self._blocks_by_col.setdefault(x, []).append(i)
+        self.reset_block_cells()
+
+    def reset_block_cells(self):
+        """Forget the cached landing and unsafe cells after the blocks or grid change"""
+        self._landing_cells = [None, None]
+        self._unsafe_cells = [None, None]
+
+    def blocks_in_column(self, x):
+        """Get the indices of the falling blocks in column x"""
+        return self._blocks_by_col.get(x, ())
+
+    def landing_cells(self, inverted=None):
+        """Get the set of (x, y) cells that falling blocks will land in, in the current or given color mode"""
+        if inverted is None:
+            inverted = self.colors_inverted
+        
+        # Landing cells only change with the blocks or the grid, so they are
+        # worked out once per color mode and reused until either changes
+        cells = self._landing_cells[inverted]
+        if cells is None:
+            rows = self.block_y.astype(np.intp)
+            
+            # First blocked row at or below each cell, GRID_SIZE if there is none
+            blocked_rows = np.where(self._blocked_masks[inverted], np.arange(GRID_SIZE), GRID_SIZE)
+            next_blocked = np.minimum.accumulate(blocked_rows[:, ::-1], axis=1)[:, ::-1]
+            
+            # Nearest other block below each block in the same column
+            below = (self.block_x[:, None] == self.block_x[None, :]) & (rows[None, :] > rows[:, None])
+            next_block = np.where(below, rows[None, :], GRID_SIZE).min(axis=1, initial=GRID_SIZE)
+            
+            # Each block comes to rest just above whichever it reaches first
+            in_grid = rows < GRID_SIZE - 1
+            next_row = np.minimum(rows + 1, GRID_SIZE - 1)
+            landing = np.minimum(next_blocked[self.block_x, next_row], next_block) - 1
+            landing = np.where(in_grid, landing, rows)
+            
+            lands = self.block_falling & (landing > rows)
+            cells = set(zip(self.block_x[lands].tolist(), landing[lands].tolist()))
+            self._landing_cells[inverted] = cells
+        return cells
+
+    def unsafe_cells(self, inverted=None):
+        """Get a table of the cells that are or will be filled, indexed [x * GRID_SIZE + y]"""
+        if inverted is None:
+            inverted = self.colors_inverted
+        
+        # Cached per color mode like the landing cells, so position checks
+        # are a single lookup instead of walking the blocks each time
+        cells = self._unsafe_cells[inverted]
+        if cells is None:
+            # Blocked grid cells, blocks at rest and cells blocks will land in
+            cells = bytearray(self._blocked_bytes_masks[inverted])
+            rows = self.block_y.astype(np.intp)
+            resting = ~self.block_falling & (rows >= 0) & (rows < GRID_SIZE)
+            for x, y in zip(self.block_x[resting].tolist(), rows[resting].tolist()):
+                cells[x * GRID_SIZE + y] = 1
+            for x, y in self.landing_cells(inverted):
+                if 0 <= y < GRID_SIZE:
+                    cells[x * GRID_SIZE + y] = 1
+            self._unsafe_cells[inverted] = cells
+        return cells
+
+    def will_block_fall_here(self, x, y, inverted=None):
         """Check if any block will fall to this position"""
-        for block in self.falling_blocks:
-            if int(block.x) == x:
-                if block.falling and int(block.y) < y:
-                    landing_y = self.simulate_block_landing(block)
-                    if landing_y == y:
-                        return True
-        return False
+        return (x, y) in self.landing_cells(inverted)
 
     def check_player_trapped_after_transition(self):
         """Check if player will be trapped after transition and blocks fall"""
+        # Look at the grid in the color mode being switched to
+        inverted = not self.colors_inverted
+        
         # First check if a block will fall on the player
-        if self.will_block_fall_here(self.player_pos[0], self.player_pos[1]):
+        if self.will_block_fall_here(self.player_pos[0], self.player_pos[1], inverted):
             return True
             
         # Check all four directions
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            new_x = self.player_pos[0] + dx
-            new_y = self.player_pos[1] + dy
-            if self.will_position_be_valid(new_x, new_y, self.endpoint):
-                return False
-        return True
+        return not self.has_valid_neighbor(self.player_pos[0], self.player_pos[1], self.endpoint, inverted)
 
-    def is_adjacent_to_player(self, x, y):
-        """Check if a position is adjacent to the player"""
-        return (abs(x - self.player_pos[0]) + abs(y - self.player_pos[1])) == 1
+    def has_valid_neighbor(self, x, y, endpoint=None, inverted=None):
+        """Check if any of the four cells next to a position will be valid"""
+        # Unrolled, since this runs for every candidate cell during level setup
+        valid = self.will_position_be_valid
+        return (valid(x, y + 1, endpoint, inverted) or valid(x, y - 1, endpoint, inverted) or
+                valid(x + 1, y, endpoint, inverted) or valid(x - 1, y, endpoint, inverted))
 
     def update_falling_blocks(self):
         """Update the positions and states of all falling blocks"""
-        blocks_moved = False
-        blocks_still_transitioning = False
-        check_trapped = False
-        
-        for block in self.falling_blocks:
-            if not block.should_start_falling():
-                blocks_still_transitioning = True
-                continue
-                
-            if block.falling:
-                # Store previous position
-                prev_y = block.y
-                prev_grid_y = int(prev_y)
-                
-                # Apply gravity
-                block.y_velocity += GRAVITY
-                # Cap maximum falling speed
-                block.y_velocity = min(block.y_velocity, 0.5)
-                new_y = block.y + block.y_velocity
-
-                # Convert to grid coordinates
-                grid_y = int(new_y)
-                grid_x = int(block.x)
-                
-                # Check if block would hit bottom of screen
-                if grid_y >= GRID_SIZE - 1:
-                    # Check if the block can fall through to the top
-                    # First, check if the space at the top is blocked
-                    if self.grid[grid_x][0] == self.colors_inverted:
-                        # If top is blocked, stop at bottom
-                        block.y = GRID_SIZE - 1
-                        block.falling = False
-                        block.y_velocity = 0
-                        self.sound_effects.play_block_fall()
-                        blocks_moved = True
-                        continue
-                    
-                    # Check for other blocks at the top
-                    blocked_at_top = False
-                    for other_block in self.falling_blocks:
-                        if block != other_block and int(other_block.x) == grid_x and int(other_block.y) == 0:
-                            blocked_at_top = True
-                            break
-                    
-                    if blocked_at_top:
-                        # If blocked by another block at top, stop at bottom
-                        block.y = GRID_SIZE - 1
-                        block.falling = False
-                        block.y_velocity = 0
-                        self.sound_effects.play_block_fall()
-                        blocks_moved = True
-                        continue
-                    
-                    # If not blocked, wrap to top
-                    block.y = 0
-                    block.y_velocity = 0
-                    blocks_moved = True
-                    continue
-
-                # Check if block would hit a blocking color
-                if grid_y + 1 < GRID_SIZE and self.grid[grid_x][grid_y + 1] == self.colors_inverted:
-                    block.y = grid_y
-                    block.falling = False
-                    block.y_velocity = 0
-                    self.sound_effects.play_block_fall()
-                    blocks_moved = True
-                    # Check if block landed adjacent to player
-                    if self.is_adjacent_to_player(grid_x, grid_y):
-                        check_trapped = True
-                    continue
-
-                # Check for collision with player (if not already in game over)
-                if not self.game_over and (grid_x == self.player_pos[0] and 
-                    (grid_y + 1 == self.player_pos[1] or 
-                     (grid_y < self.player_pos[1] and new_y + 1 > self.player_pos[1]))):
-                    # Block has landed on player - trigger game over
-                    self.trigger_game_over(DEATH_CRUSHED)
-                    # Still update block position for visual consistency
-                    block.y = grid_y
-                    block.falling = False
-                    block.y_velocity = 0
-                    self.sound_effects.play_block_fall()
-                    blocks_moved = True
-                    continue
-
-                # Check for collision with other blocks
-                for other_block in self.falling_blocks:
-                    if block != other_block:
-                        other_grid_y = int(other_block.y)
-                        if (grid_x == int(other_block.x) and 
-                            (grid_y + 1 == other_grid_y or 
-                             (grid_y < other_grid_y and new_y + 1 > other_grid_y))):
-                            block.y = grid_y
-                            block.falling = False
-                            block.y_velocity = 0
-                            self.sound_effects.play_block_fall()
-                            blocks_moved = True
-                            # Check if block landed adjacent to player
-                            if self.is_adjacent_to_player(grid_x, grid_y):
-                                check_trapped = True
-                            break
-                else:
-                    block.y = new_y
-                    if int(block.y) != int(prev_y):
-                        blocks_moved = True
-                        # If block moved through a position adjacent to player, check if we need to check trapped
-                        if (self.is_adjacent_to_player(grid_x, prev_grid_y) or 
-                            self.is_adjacent_to_player(grid_x, grid_y)):
-                            check_trapped = True
+        # Count down start delays; blocks still waiting don't move this frame
+        waiting = self.block_fall_delay > 0
+        self.block_fall_delay[waiting] -= 1
+        blocks_still_transitioning = bool(waiting.any())
+        
+        # With every block at rest or waiting nothing moves, lands or needs
+        # a trapped check, so the per-block pass is skipped altogether
+        active = self.block_falling & ~waiting
+        if not active.any():
+            self.movement_locked = blocks_still_transitioning
+            return blocks_still_transitioning
+        
+        # Apply gravity to all active blocks at once, capping maximum falling speed
+        self.block_vy[active] = np.minimum(self.block_vy[active] + GRAVITY, 0.5)
+        new_ys = (self.block_y + self.block_vy).tolist()
+        
+        # Resolve landings one block at a time, since each block sees the
+        # positions other blocks have already reached this frame
+        xs = self.block_x.tolist()
+        ys = self.block_y.tolist()
+        y_velocities = self.block_vy.tolist()
+        falling = self.block_falling.tolist()
+        
+        landed, blocks_moved, check_trapped, crushed = _step_blocks(
+            np.flatnonzero(active).tolist(), xs, ys, new_ys, y_velocities, falling,
+            self._blocked_bytes,
+            self.player_pos[0], self.player_pos[1], self.game_over)
+        
+        # Landing sounds and game over are handled once the blocks have moved
+        for _ in range(landed):
+            self.sound_effects.play_block_fall()
+        if crushed:
+            # Block has landed on player - trigger game over
+            self.trigger_game_over(DEATH_CRUSHED)
+        
+        self.block_y = np.array(ys, dtype=np.float64)
+        self.block_vy = np.array(y_velocities, dtype=np.float64)
+        self.block_falling = np.array(falling, dtype=bool)
+        self.reset_block_cells()
                         
         # Keep movement locked while blocks are still moving or in initial delay
         self.movement_locked = blocks_moved or blocks_still_transitioning
@@ -652,46 +836,91 @@ class Game:
 
     def generate_grid(self, make_easier=False):
         """Generate the grid layout, optionally making it easier with more walkable spaces"""
-        self.grid = []
         scale = 3.0 + (self.level * 0.3)  # Smaller scale for more detail
         
         if make_easier:
             noise_threshold = -0.2
         else:
             noise_threshold = 0.0
-            
-        for x in range(GRID_SIZE):
-            row = []
-            for y in range(GRID_SIZE):
-                # Add some random offset to coordinates for more chaos
-                x_offset = x + random.uniform(-0.5, 0.5)
-                y_offset = y + random.uniform(-0.5, 0.5)
-                
-                value = noise.pnoise2(x_offset/scale, 
-                                    y_offset/scale, 
-                                    octaves=4,  # More octaves for more detail
-                                    persistence=0.7,  # Higher persistence to make details more prominent
-                                    lacunarity=3.0,  # Higher lacunarity for more variation between octaves
-                                    repeatx=GRID_SIZE,
-                                    repeaty=GRID_SIZE,
-                                    base=random.randint(0, 1000))
-                
-                # Add a second layer of noise at a different scale
-                value2 = noise.pnoise2((x_offset + 100)/scale * 2, 
-                                     (y_offset + 100)/scale * 2,
-                                     octaves=2,
-                                     persistence=0.8,
-                                     lacunarity=2.5,
-                                     repeatx=GRID_SIZE,
-                                     repeaty=GRID_SIZE,
-                                     base=random.randint(0, 1000))
-                
-                # Combine the noise values with some randomness
-                combined_value = value * 0.6 + value2 * 0.4 + random.uniform(-0.1, 0.1)
-                
-                # Convert to binary (True for white, False for black)
-                row.append(combined_value > noise_threshold)
-            self.grid.append(row)
+        
+        # Cell coordinates indexed [x, y], with some random offset for more chaos
+        shape = (GRID_SIZE, GRID_SIZE)
+        xs, ys = np.meshgrid(np.arange(GRID_SIZE), np.arange(GRID_SIZE), indexing='ij')
+        x_offset = xs + np.random.uniform(-0.5, 0.5, shape)
+        y_offset = ys + np.random.uniform(-0.5, 0.5, shape)
+        
+        # Noise for every cell at once; one random base per layer keeps each
+        # layer a single coherent noise field
+        value = perlin.pnoise2(x_offset/scale, 
+                               y_offset/scale, 
+                               octaves=4,  # More octaves for more detail
+                               persistence=0.7,  # Higher persistence to make details more prominent
+                               lacunarity=3.0,  # Higher lacunarity for more variation between octaves
+                               repeatx=GRID_SIZE,
+                               repeaty=GRID_SIZE,
+                               base=np.random.randint(0, 1001))
+        
+        # Add a second layer of noise at a different scale
+        value2 = perlin.pnoise2((x_offset + 100)/scale * 2, 
+                                (y_offset + 100)/scale * 2,
+                                octaves=2,
+                                persistence=0.8,
+                                lacunarity=2.5,
+                                repeatx=GRID_SIZE,
+                                repeaty=GRID_SIZE,
+                                base=np.random.randint(0, 1001))
+        
+        # Combine the noise values with some randomness
+        combined_value = value * 0.6 + value2 * 0.4 + np.random.uniform(-0.1, 0.1, shape)
+        
+        # Convert to binary (True for white, False for black), indexed grid[x][y]
+        self.grid = combined_value > noise_threshold
+        
+        # Blocked cells for either color mode, so switching modes is just a lookup
+        self._blocked_masks = (~self.grid, self.grid)
+        
+        # The same masks flattened to bytes indexed [x * GRID_SIZE + y], which
+        # are much cheaper than NumPy indexing for single-cell checks in Python
+        self._blocked_bytes_masks = tuple(blocked.tobytes() for blocked in self._blocked_masks)
+        self.set_colors_inverted(self.colors_inverted)
+        self.reset_block_cells()
+        
+        # Pre-render the grid for both color modes so drawing it is a single blit
+        self._grid_surfaces = tuple(self.render_grid_surface(blocked)
+                                    for blocked in self._blocked_masks)
+
+    def render_grid_lines(self):
+        """Draw the outline of every grid cell onto a surface that is transparent elsewhere"""
+        surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE)).convert()
+        surface.fill(GRID_LINES_KEY)
+        surface.set_colorkey(GRID_LINES_KEY)
+        # Every cell's outline covers its first and last row and column, so
+        # together they form two full-length lines along each cell edge
+        last = WINDOW_SIZE - 1
+        for i in range(GRID_SIZE):
+            for edge in (i * CELL_SIZE, i * CELL_SIZE + CELL_SIZE - 1):
+                pygame.draw.line(surface, GRID_COLOR, (edge, 0), (edge, last))
+                pygame.draw.line(surface, GRID_COLOR, (0, edge), (last, edge))
+        return surface
+
+    def render_grid_surface(self, blocked):
+        """Draw the grid cells and lines for a blocked-cell mask onto a new surface"""
+        surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE)).convert()
+        
+        # Color every cell at once: pick each cell's mapped color, then scale
+        # the [x, y] cell array up to one entry per pixel
+        colors = np.where(blocked, surface.map_rgb(BLACK), surface.map_rgb(WHITE))
+        pixels = colors.repeat(CELL_SIZE, axis=0).repeat(CELL_SIZE, axis=1)
+        pygame.surfarray.blit_array(surface, pixels)
+        surface.blit(self._grid_lines, (0, 0))
+        return surface
+
+    def set_colors_inverted(self, inverted):
+        """Switch color modes, updating which grid cells are blocked"""
+        self.colors_inverted = inverted
+        self._blocked_bytes = self._blocked_bytes_masks[inverted]
+        # The cells one mode can walk on are exactly those the other mode blocks
+        self._walkable = self._blocked_masks[not inverted]
 
     def manhattan_distance(self, pos1, pos2):
         """Calculate the Manhattan distance between two grid positions"""
@@ -700,83 +929,106 @@ class Game:
     def is_position_safe_from_blocks(self, x, y):
         """Check if a position is safe from any initial block falls"""
         # Check if any block starts above this position
-        for block in self.falling_blocks:
-            if int(block.x) == x and int(block.y) < y:
+        block_y = self.block_y
+        for i in self.blocks_in_column(x):
+            if int(block_y[i]) < y:
                 return False
         return True
 
-    def will_position_be_valid(self, x, y, endpoint=None):
-        """Check if a position will be valid after blocks fall"""
+    def will_position_be_valid(self, x, y, endpoint=None, inverted=None):
+        """Check if a position will be valid after blocks fall, in the current or given color mode"""
+        # The last row and column index, used by the bounds check below
+        last = GRID_SIZE - 1
+        
         # First check if the position is within bounds
-        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+        # (any negative coordinate or distance to the far edge makes the OR negative)
+        if (x | y | (last - x) | (last - y)) < 0:
             return False
             
         # If it's the endpoint, it's always valid
         if endpoint is not None and (x, y) == endpoint:
             return True
             
-        # Check if the position is currently blocked by the grid
-        if self.grid[x][y] == self.colors_inverted:
-            return False
-            
-        # Check if there's currently a block there
-        for block in self.falling_blocks:
-            if int(block.x) == x and int(block.y) == y and not block.falling:
-                return False
-                
-        # Check if a block will fall here
-        if self.will_block_fall_here(x, y):
-            return False
-            
-        return True
+        # Check if the position is blocked by the grid, a block at rest
+        # or a block that will fall here
+        return not self.unsafe_cells(inverted)[x * GRID_SIZE + y]
+
+    def label_walkable_regions(self):
+        """Label each walkable cell with the id of the connected region it belongs to"""
+        cells = [tuple(cell) for cell in np.argwhere(self._walkable).tolist()]
+        walkable = set(cells)
+        labels = {}
+        region = 0
+        for seed in cells:
+            if seed in labels:
+                continue
+            # Flood fill the region containing this cell
+            region += 1
+            labels[seed] = region
+            queue = deque([seed])
+            while queue:
+                x, y = queue.popleft()
+                for dx, dy in NEIGHBOR_OFFSETS:
+                    neighbor = (x + dx, y + dy)
+                    if neighbor in walkable and neighbor not in labels:
+                        labels[neighbor] = region
+                        queue.append(neighbor)
+        return labels
 
     def find_valid_positions(self, min_distance):
-        """Find all valid positions that are at least min_distance apart"""
-        valid_positions = []
-        
+        """Find a start and endpoint in the same walkable region at least min_distance apart"""
         # Define the safe spawn area (exclude top 5 rows)
         SPAWN_EXCLUSION_ROWS = 5
         
-        # First, collect all valid positions (walkable spaces)
-        for x in range(GRID_SIZE):
-            for y in range(GRID_SIZE):
-                # Skip positions in the top 5 rows for player spawn
-                if self.grid[x][y] != self.colors_inverted and self.is_position_safe_from_blocks(x, y):
-                    valid_positions.append((x, y))
+        # Method lookups hoisted out of the candidate loops
+        is_safe = self.is_position_safe_from_blocks
+        has_valid_neighbor = self.has_valid_neighbor
         
+        # Only walkable spaces that no block starts above are candidates
+        labels = self.label_walkable_regions()
+        valid_positions = [pos for pos in labels if is_safe(*pos)]
         if not valid_positions:
             return None, None
             
         # Shuffle the positions for randomness
-        random.shuffle(valid_positions)
+        valid_positions = [valid_positions[i] for i in np.random.permutation(len(valid_positions)).tolist()]
+        
+        # Group the endpoints that have at least one valid adjacent position by region,
+        # tracking the extremes of x + y and x - y to bound their distance from any start
+        endpoints = {}
+        extremes = {}
+        for end_pos in valid_positions:
+            if has_valid_neighbor(end_pos[0], end_pos[1], end_pos):
+                region = labels[end_pos]
+                endpoints.setdefault(region, []).append(end_pos)
+                diag, anti = end_pos[0] + end_pos[1], end_pos[0] - end_pos[1]
+                lo_diag, hi_diag, lo_anti, hi_anti = extremes.get(region, (diag, diag, anti, anti))
+                extremes[region] = (min(lo_diag, diag), max(hi_diag, diag),
+                                    min(lo_anti, anti), max(hi_anti, anti))
         
         # Try each position as a potential player start
         for start_pos in valid_positions:
             # Skip positions in the top 5 rows for player spawn
             if start_pos[1] < SPAWN_EXCLUSION_ROWS:
                 continue
-                
-            # For each potential start position, verify it has at least one valid move
-            has_valid_move = False
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                new_x = start_pos[0] + dx
-                new_y = start_pos[1] + dy
-                if self.will_position_be_valid(new_x, new_y):
-                    has_valid_move = True
-                    break
             
-            if not has_valid_move:
+            # Skip starts whose region has no endpoint far enough away
+            region = labels[start_pos]
+            if region not in extremes:
+                continue
+            lo_diag, hi_diag, lo_anti, hi_anti = extremes[region]
+            diag, anti = start_pos[0] + start_pos[1], start_pos[0] - start_pos[1]
+            if max(hi_diag - diag, diag - lo_diag, hi_anti - anti, anti - lo_anti) < min_distance:
                 continue
                 
-            # Find a valid endpoint that's far enough away
-            for end_pos in valid_positions:
-                if start_pos != end_pos and self.manhattan_distance(start_pos, end_pos) >= min_distance:
-                    # Also verify the endpoint is reachable (has at least one adjacent valid position)
-                    for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                        end_adj_x = end_pos[0] + dx
-                        end_adj_y = end_pos[1] + dy
-                        if self.will_position_be_valid(end_adj_x, end_adj_y, end_pos):
-                            return start_pos, end_pos
+            # Verify the start has at least one valid move
+            if not has_valid_neighbor(start_pos[0], start_pos[1]):
+                continue
+                
+            # One of the region's endpoints is known to be far enough away
+            for end_pos in endpoints[region]:
+                if self.manhattan_distance(start_pos, end_pos) >= min_distance:
+                    return start_pos, end_pos
         
         return None, None  # No valid pair found
 
@@ -786,7 +1038,7 @@ class Game:
         while True:
             x = random.randint(0, GRID_SIZE-1)
             y = random.randint(0, GRID_SIZE-1)
-            if self.grid[x][y] != self.colors_inverted:
+            if not self._blocked_bytes[x * GRID_SIZE + y]:
                 self.player_pos = [x, y]
                 break
 
@@ -796,24 +1048,23 @@ class Game:
             x = random.randint(0, GRID_SIZE-1)
             y = random.randint(0, GRID_SIZE-1)
             if (x, y) != (self.player_pos[0], self.player_pos[1]) and \
-               self.grid[x][y] != self.colors_inverted:
+               not self._blocked_bytes[x * GRID_SIZE + y]:
                 self.endpoint = (x, y)
                 break
 
-    def is_valid_move(self, new_x, new_y):
-        return self.will_position_be_valid(new_x, new_y, self.endpoint)
-
     def handle_movement(self, dx, dy):
         """Handle player movement"""
         # Don't allow movement during transitions or when movement is locked
         if self.is_transitioning or self.movement_locked or self.game_over:
             return False
+        return self.move_player(dx, dy)
 
+    def move_player(self, dx, dy):
+        """Move the player one cell if the destination is valid, without checking for locks"""
         new_x = self.player_pos[0] + dx
         new_y = self.player_pos[1] + dy
 
-        if self.is_valid_move(new_x, new_y):
-            old_pos = self.player_pos.copy()
+        if self.will_position_be_valid(new_x, new_y, self.endpoint):
             self.player_pos = [new_x, new_y]
             self.sound_effects.play_move()
             # Mark that a move has been made
@@ -821,29 +1072,76 @@ class Game:
             return True
         return False
 
+    def update_direction_table(self):
+        """Rebuild the table of movement keys and directions from the keybindings"""
+        self._dir_table = [(tuple(self.keybindings[direction]), dx, dy)
+                           for direction, dx, dy in [("left", -1, 0), ("right", 1, 0),
+                                                     ("up", 0, -1), ("down", 0, 1)]]
+
+    def update_key_actions(self):
+        """Rebuild the table of gameplay actions each key can trigger from the keybindings"""
+        # A key bound to several actions tries them in this order, and the
+        # first one that applies handles the press
+        self._keydown_actions = {}
+        for action, handler in [("pause", self.pause_game),
+                                ("restart", self.restart_after_game_over),
+                                ("contrast", self.start_contrast_preview)]:
+            key = self.keybindings[action]
+            self._keydown_actions[key] = self._keydown_actions.get(key, ()) + (handler,)
+
+    def pause_game(self):
+        """Open the pause menu"""
+        self.menu_state = MENU_PAUSE
+        self.selected_menu_item = 0
+        return True
+
+    def restart_after_game_over(self):
+        """Start a new game if the current one is over, returning whether it was"""
+        if not self.game_over:
+            return False
+        self.reset_game_state()
+        return True
+
+    def start_contrast_preview(self):
+        """Start previewing the contrast switch if one is allowed, returning whether it was"""
+        if self.is_transitioning or self.game_over:
+            return False
+        self.showing_contrast_preview = True
+        self.preview_alpha = 0
+        return True
+
+    def update_keybind_labels(self):
+        """Rebuild the keybinding menu's item labels and the key names shown elsewhere"""
+        self._key_labels = {action: self.get_key_name(keys) for action, keys in self.keybindings.items()}
+        self._keybind_labels = []
+        for action, keys in self.keybindings.items():
+            if isinstance(keys, list):
+                key_names = [pygame.key.name(k).upper() for k in keys]
+                self._keybind_labels.append(f"{action.title()}: {' or '.join(key_names)}")
+            else:
+                self._keybind_labels.append(f"{action.title()}: {pygame.key.name(keys).upper()}")
+        self._keybind_labels.append("Back")
+
     def handle_continuous_movement(self):
+        """Move the player in every direction whose key is held, once the cooldown has elapsed"""
         # Only process movement if cooldown has elapsed
         if self.movement_delay > 0:
             self.movement_delay -= 1
             return
 
-        # Get current keyboard state
+        # Get current keyboard state once for all directions
         keys = pygame.key.get_pressed()
         
-        # Check movement keys
+        # Check movement keys; this only runs while movement is allowed, so
+        # moves skip handle_movement's lock checks
         moved = False
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.handle_movement(-1, 0)
-            moved = True
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.handle_movement(1, 0)
-            moved = True
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.handle_movement(0, -1)
-            moved = True
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            self.handle_movement(0, 1)
-            moved = True
+        move = self.move_player
+        for key_list, dx, dy in self._dir_table:
+            for key in key_list:
+                if keys[key]:
+                    move(dx, dy)
+                    moved = True
+                    break
 
         # Reset movement delay if any movement occurred
         if moved:
@@ -852,42 +1150,56 @@ class Game:
     def draw_glow(self, surface, position, color, radius):
         """Draw a soft glow effect"""
         x, y = position
-        glow_surf = pygame.Surface((radius * 4, radius * 4), pygame.SRCALPHA)
         
-        for i in range(3):
-            pygame.draw.circle(glow_surf, (*color[:3], 20),
-                             (radius * 2, radius * 2), radius * (1.5 - i * 0.2))
+        # The glow only depends on its color and radius, so draw it once
+        key = (tuple(color[:3]), radius)
+        glow_surf = self._glow_cache.get(key)
+        if glow_surf is None:
+            glow_surf = pygame.Surface((radius * 4, radius * 4), pygame.SRCALPHA).convert_alpha()
+            self._glow_cache[key] = glow_surf
+            for i in range(3):
+                pygame.draw.circle(glow_surf, (*color[:3], 20),
+                                 (radius * 2, radius * 2), radius * (1.5 - i * 0.2))
         
         surface.blit(glow_surf, (x - radius * 2, y - radius * 2))
 
     def draw_rounded_rect(self, surface, color, rect, radius):
         """Draw a rectangle with rounded corners"""
-        pygame.draw.rect(surface, color, rect.inflate(-radius * 2, 0))
-        pygame.draw.rect(surface, color, rect.inflate(0, -radius * 2))
-        
-        for corner in [(rect.topleft, rect.topright, rect.bottomright, rect.bottomleft)]:
-            for x, y in corner:
-                pygame.draw.circle(surface, color, (x, y), radius)
+        pygame.draw.rect(surface, color, rect, border_radius=radius)
 
     def draw_portal(self, surface, x, y, tick):
         """Draw an animated portal for the exit"""
         radius = PLAYER_SIZE // 2
-        inner_radius = radius * 0.7
         
-        # Outer circle (static)
-        pygame.draw.circle(surface, PORTAL_COLORS[0], (x, y), radius)
+        # The portal's look only depends on the tick, so reuse the last frame's
+        frame_tick, portal_surface = self._portal_frame
+        if frame_tick == tick:
+            surface.blit(portal_surface, (x - radius, y - radius))
+            return
+        inner_radius = radius * 0.7
         
         # Inner circle (pulsing)
-        pulse = math.sin(tick * 0.1) * 0.2 + 0.8
+        pulse = _sin(tick * 0.1) * 0.2 + 0.8
         inner_radius = int(inner_radius * pulse)
-        pygame.draw.circle(surface, PORTAL_COLORS[1], (x, y), inner_radius)
         
         # Add some "sparkles" rotating around the portal
+        sparkles = []
         for i in range(3):
             angle = tick * 0.1 + (i * 2 * math.pi / 3)
-            sparkle_x = x + int(math.cos(angle) * radius * 0.8)
-            sparkle_y = y + int(math.sin(angle) * radius * 0.8)
-            pygame.draw.circle(surface, WHITE, (sparkle_x, sparkle_y), 2)
+            sparkles.append((int(_cos(angle) * radius * 0.8), int(_sin(angle) * radius * 0.8)))
+        
+        # Draw each distinct look of the portal once, centered on its surface
+        key = (inner_radius, tuple(sparkles))
+        portal_surface = self._portal_cache.get(key)
+        if portal_surface is None:
+            portal_surface = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA).convert_alpha()
+            pygame.draw.circle(portal_surface, PORTAL_COLORS[0], (radius, radius), radius)
+            pygame.draw.circle(portal_surface, PORTAL_COLORS[1], (radius, radius), inner_radius)
+            for sparkle_x, sparkle_y in sparkles:
+                pygame.draw.circle(portal_surface, WHITE, (radius + sparkle_x, radius + sparkle_y), 2)
+            self._portal_cache[key] = portal_surface
+        self._portal_frame = (tick, portal_surface)
+        surface.blit(portal_surface, (x - radius, y - radius))
 
     def draw_player(self, surface, x, y):
         """Draw the player as a @ symbol with a glow effect"""
@@ -896,10 +1208,8 @@ class Game:
         
         # Render the @ symbol
         text_color = RED
-        player_text = self.player_font.render("@", True, text_color)
-        
         # Center the text in the cell
-        text_rect = player_text.get_rect(center=(x, y))
+        player_text, text_rect = self.render_text_centered(self.player_font, "@", text_color, (x, y))
         
         # Draw the text
         surface.blit(player_text, text_rect)
@@ -917,10 +1227,10 @@ class Game:
                     text_alpha = 255
                 
                 # Create text surfaces
-                level_text = self.level_announcement_small_font.render("LEVEL", True, 
-                                                                     WHITE if self.colors_inverted else BLACK)
-                number_text = self.level_announcement_font.render(str(self.next_level), True, 
-                                                               WHITE if self.colors_inverted else BLACK)
+                level_text = self.render_text(self.level_announcement_small_font, "LEVEL",
+                                              WHITE if self.colors_inverted else BLACK, text_alpha)
+                number_text = self.render_text(self.level_announcement_font, str(self.next_level),
+                                               WHITE if self.colors_inverted else BLACK, text_alpha)
                 
                 # Calculate positions
                 center_x = WINDOW_SIZE // 2
@@ -930,19 +1240,17 @@ class Game:
                 level_rect = level_text.get_rect(centerx=center_x, bottom=center_y - 5)
                 number_rect = number_text.get_rect(centerx=center_x, top=center_y + 5)
                 
-                # Create a surface for the announcement
-                announcement_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-                
-                # Set alpha for the text
-                level_text.set_alpha(text_alpha)
-                number_text.set_alpha(text_alpha)
+                # Clear just the part of the overlay the texts cover
+                announcement_surface = self._screen_overlay
+                used_rect = level_rect.union(number_rect)
+                announcement_surface.fill((0, 0, 0, 0), used_rect)
                 
                 # Draw texts
                 announcement_surface.blit(level_text, level_rect)
                 announcement_surface.blit(number_text, number_rect)
                 
                 # Draw the announcement
-                surface.blit(announcement_surface, (0, 0))
+                surface.blit(announcement_surface, used_rect, used_rect)
 
     def draw_direction_indicator(self, surface):
         """Draw an arrow pointing from the player to the portal"""
@@ -963,32 +1271,38 @@ class Game:
                 dx /= length
                 dy /= length
                 
+                # The indicator is drawn on a small surface around the player,
+                # so work in coordinates relative to its corner
+                origin_x = player_x - INDICATOR_REACH
+                origin_y = player_y - INDICATOR_REACH
+                start_x = start_y = INDICATOR_REACH
+                
                 # Calculate end point of indicator
-                end_x = player_x + dx * INDICATOR_LENGTH
-                end_y = player_y + dy * INDICATOR_LENGTH
+                end_x = start_x + dx * INDICATOR_LENGTH
+                end_y = start_y + dy * INDICATOR_LENGTH
                 
-                # Create a surface for the indicator with alpha channel
-                indicator_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+                # Clear the reused indicator surface
+                indicator_surface = self._indicator_surface
+                indicator_surface.fill((0, 0, 0, 0))
                 
                 # Draw the main line
                 pygame.draw.line(indicator_surface, INDICATOR_COLOR,
-                               (player_x, player_y), (end_x, end_y), INDICATOR_WIDTH)
+                               (start_x, start_y), (end_x, end_y), INDICATOR_WIDTH)
                 
-                # Calculate arrow head points
-                arrow_angle = math.pi / 6
+                # Calculate arrow head points by rotating the unit direction
+                # both ways by the head angle
                 head_length = INDICATOR_HEAD_SIZE
-                
-                # Calculate the angle of the main line
-                angle = math.atan2(dy, dx)
-                
-                # Calculate arrow head points
+                along_x = dx * INDICATOR_HEAD_COS
+                along_y = dy * INDICATOR_HEAD_COS
+                across_x = dy * INDICATOR_HEAD_SIN
+                across_y = dx * INDICATOR_HEAD_SIN
                 head_left = (
-                    end_x - head_length * math.cos(angle + arrow_angle),
-                    end_y - head_length * math.sin(angle + arrow_angle)
+                    end_x - head_length * (along_x - across_x),
+                    end_y - head_length * (along_y + across_y)
                 )
                 head_right = (
-                    end_x - head_length * math.cos(angle - arrow_angle),
-                    end_y - head_length * math.sin(angle - arrow_angle)
+                    end_x - head_length * (along_x + across_x),
+                    end_y - head_length * (along_y - across_y)
                 )
                 
                 # Draw arrow head
@@ -996,11 +1310,11 @@ class Game:
                                   [(end_x, end_y), head_left, head_right])
                 
                 # Add a pulsing effect based on animation tick
-                pulse = abs(math.sin(self.animation_tick * 0.05)) * 0.4 + 0.6
+                pulse = abs(_sin(self.animation_tick * 0.05)) * 0.4 + 0.6
                 indicator_surface.set_alpha(int(160 * pulse))
                 
                 # Draw the indicator
-                surface.blit(indicator_surface, (0, 0))
+                surface.blit(indicator_surface, (origin_x, origin_y))
 
     def check_player_trapped(self):
         """Check if the player has no valid moves in their current position"""
@@ -1011,18 +1325,12 @@ class Game:
         # First check if a block will fall on the player
         if self.will_block_fall_here(self.player_pos[0], self.player_pos[1]):
             # If no moves have been made yet, don't consider this trapped
-            if not hasattr(self, '_moves_made'):
-                self._moves_made = False
+            if not self._moves_made:
                 return False
             return True
             
         # Check all four directions
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            new_x = self.player_pos[0] + dx
-            new_y = self.player_pos[1] + dy
-            if self.will_position_be_valid(new_x, new_y, self.endpoint):
-                return False
-        return True
+        return not self.has_valid_neighbor(self.player_pos[0], self.player_pos[1], self.endpoint)
 
     def trigger_game_over(self, reason):
         """Trigger the game over state with a specific reason"""
@@ -1031,46 +1339,60 @@ class Game:
         self.game_over_reason = reason
         self.death_animation_timer = self.death_animation_duration
         
-        # Create death particles
+        # Create death particles bursting out evenly around the player
         num_particles = 12
-        for i in range(num_particles):
-            angle = (i / num_particles) * 2 * math.pi
-            speed = random.uniform(2, 4)
-            self.death_particles.append({
-                'x': self.player_pos[0] * CELL_SIZE + CELL_SIZE // 2,
-                'y': self.player_pos[1] * CELL_SIZE + CELL_SIZE // 2,
-                'dx': math.cos(angle) * speed,
-                'dy': math.sin(angle) * speed,
-                'alpha': 255,
-                'size': random.randint(3, 6)
-            })
+        speeds, sizes = [], []
+        for _ in range(num_particles):
+            speeds.append(random.uniform(2, 4))
+            sizes.append(random.randint(3, 6))
+        angles = np.arange(num_particles) / num_particles * 2 * math.pi
+        self.set_death_particles(np.full(num_particles, self.player_pos[0] * CELL_SIZE + CELL_SIZE // 2),
+                                 np.full(num_particles, self.player_pos[1] * CELL_SIZE + CELL_SIZE // 2),
+                                 np.cos(angles) * speeds,
+                                 np.sin(angles) * speeds,
+                                 sizes)
+
+    def set_death_particles(self, xs, ys, dxs, dys, sizes):
+        """Replace the death particles, each starting fully opaque"""
+        # Particle state is kept as parallel arrays, one entry per particle
+        self.particle_x = np.array(xs, dtype=np.float64)
+        self.particle_y = np.array(ys, dtype=np.float64)
+        self.particle_dx = np.array(dxs, dtype=np.float64)
+        self.particle_dy = np.array(dys, dtype=np.float64)
+        self.particle_alpha = np.full(len(self.particle_x), 255, dtype=np.intp)
+        self.particle_size = np.array(sizes, dtype=np.intp)
 
     def update_death_animation(self):
         """Update death animation particles"""
         if self.death_animation_timer > 0:
             self.death_animation_timer -= 1
             
-            # Update particles
-            for particle in self.death_particles:
-                particle['x'] += particle['dx']
-                particle['y'] += particle['dy']
-                particle['dy'] += 0.2  # Gravity
-                particle['alpha'] = max(0, particle['alpha'] - 4)  # Fade out
+            # Update all particles at once
+            self.particle_x += self.particle_dx
+            self.particle_y += self.particle_dy
+            self.particle_dy += 0.2  # Gravity
+            np.maximum(self.particle_alpha - 4, 0, out=self.particle_alpha)  # Fade out
 
     def draw_death_animation(self, surface):
         """Draw the death animation"""
         if self.death_animation_timer > 0:
             # Draw particles
-            for particle in self.death_particles:
-                if particle['alpha'] > 0:
-                    particle_surface = pygame.Surface((particle['size'], particle['size']), pygame.SRCALPHA)
-                    particle_color = (*RED[:3], particle['alpha'])
-                    pygame.draw.circle(particle_surface, particle_color,
-                                    (particle['size']//2, particle['size']//2),
-                                    particle['size']//2)
+            for x, y, alpha, size in zip(self.particle_x.tolist(), self.particle_y.tolist(),
+                                         self.particle_alpha.tolist(), self.particle_size.tolist()):
+                if alpha > 0:
+                    # Particles only come in a few sizes and fade in fixed
+                    # steps, so each (size, alpha) glyph is drawn just once
+                    particle_surface = self._particle_glyphs.get((size, alpha))
+                    if particle_surface is None:
+                        particle_surface = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+                        particle_color = (*RED[:3], alpha)
+                        pygame.draw.circle(particle_surface, particle_color,
+                                        (size//2, size//2),
+                                        size//2)
+                        self._particle_glyphs[size, alpha] = particle_surface
                     surface.blit(particle_surface,
-                               (particle['x'] - particle['size']//2,
-                                particle['y'] - particle['size']//2))
+                               (x - size//2,
+                                y - size//2))
 
     def draw_game_over(self, surface):
         """Draw the game over screen"""
@@ -1080,34 +1402,32 @@ class Game:
         # Increase alpha for fade-in effect
         self.game_over_alpha = min(255, self.game_over_alpha + 5)
         
-        # Create a surface for the game over display
-        overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        
-        # Draw semi-transparent background
+        # Draw semi-transparent background over the whole overlay
+        overlay = self._screen_overlay
         overlay.fill((0, 0, 0, min(180, self.game_over_alpha)))
         
         # Draw "GAME OVER" text
-        game_over_text = self.game_over_font.render("GAME OVER", True, GAME_OVER_COLOR)
-        text_rect = game_over_text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 - 60))
-        game_over_text.set_alpha(self.game_over_alpha)
+        game_over_text, text_rect = self.render_text_centered(self.game_over_font, "GAME OVER", GAME_OVER_COLOR,
+                                                              (WINDOW_SIZE // 2, WINDOW_SIZE // 2 - 60),
+                                                              self.game_over_alpha)
         overlay.blit(game_over_text, text_rect)
         
         # Draw reason text
-        reason_text = self.restart_font.render(self.game_over_reason, True, GAME_OVER_COLOR)
-        reason_rect = reason_text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 - 20))
-        reason_text.set_alpha(self.game_over_alpha)
+        reason_text, reason_rect = self.render_text_centered(self.restart_font, self.game_over_reason, GAME_OVER_COLOR,
+                                                             (WINDOW_SIZE // 2, WINDOW_SIZE // 2 - 20),
+                                                             self.game_over_alpha)
         overlay.blit(reason_text, reason_rect)
         
         # Draw level reached text
-        level_text = self.restart_font.render(f"You reached Level {self.level}", True, RESTART_TEXT_COLOR)
-        level_rect = level_text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 + 20))
-        level_text.set_alpha(self.game_over_alpha)
+        level_text, level_rect = self.render_text_centered(self.restart_font, f"You reached Level {self.level}", RESTART_TEXT_COLOR,
+                                                           (WINDOW_SIZE // 2, WINDOW_SIZE // 2 + 20),
+                                                           self.game_over_alpha)
         overlay.blit(level_text, level_rect)
         
         # Draw restart instruction
-        restart_text = self.restart_font.render("Press R to restart", True, RESTART_TEXT_COLOR)
-        restart_rect = restart_text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 + 60))
-        restart_text.set_alpha(self.game_over_alpha)
+        restart_text, restart_rect = self.render_text_centered(self.restart_font, "Press R to restart", RESTART_TEXT_COLOR,
+                                                               (WINDOW_SIZE // 2, WINDOW_SIZE // 2 + 60),
+                                                               self.game_over_alpha)
         overlay.blit(restart_text, restart_rect)
         
         # Draw the overlay
@@ -1121,31 +1441,8 @@ class Game:
         # Get player's current grid position
         px, py = self.player_pos
         
-        # Create a surface for the indicator
-        cell_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-        
-        # Draw the lock indicator
-        pygame.draw.rect(cell_surface, MOVEMENT_LOCK_COLOR,
-                        (0, 0, CELL_SIZE, CELL_SIZE))
-        pygame.draw.rect(cell_surface, MOVEMENT_LOCK_BORDER,
-                        (0, 0, CELL_SIZE, CELL_SIZE), 2)
-        
-        # Draw small lock symbols or arrows in each direction
-        arrow_length = CELL_SIZE // 4
-        center_x = CELL_SIZE // 2
-        center_y = CELL_SIZE // 2
-        
-        # Draw crossed lines to indicate movement is locked
-        for offset in [-arrow_length, arrow_length]:
-            pygame.draw.line(cell_surface, MOVEMENT_LOCK_BORDER,
-                           (center_x + offset, center_y - arrow_length),
-                           (center_x + offset, center_y + arrow_length), 2)
-            pygame.draw.line(cell_surface, MOVEMENT_LOCK_BORDER,
-                           (center_x - arrow_length, center_y + offset),
-                           (center_x + arrow_length, center_y + offset), 2)
-        
         # Draw the indicator at player position
-        surface.blit(cell_surface, 
+        surface.blit(self._lock_surface, 
                     (px * CELL_SIZE, py * CELL_SIZE))
 
     def draw_danger_indicators(self, surface):
@@ -1156,8 +1453,20 @@ class Game:
         # Get player's current grid position
         px, py = self.player_pos
         
+        # The indicators only depend on the player, the portal, the color
+        # mode being previewed and the cells that are or will be filled, so
+        # they are worked out again only once one of those changes
+        preview = self.showing_contrast_preview
+        key = (px, py, self.endpoint, self.colors_inverted, preview, self.unsafe_cells(),
+               self.unsafe_cells(not self.colors_inverted) if preview else None)
+        if key == self._danger_key:
+            surface.blits(self._danger_blits, doreturn=False)
+            return
+        self._danger_key = key
+        self._danger_blits = []
+        
         # Check each adjacent position
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+        for dx, dy in NEIGHBOR_OFFSETS:
             new_x = px + dx
             new_y = py + dy
             
@@ -1165,41 +1474,61 @@ class Game:
             if not (0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE):
                 continue
                 
-            # Create a surface for this cell
-            cell_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-            
-            # If showing contrast preview, check validity after contrast switch
-            if self.showing_contrast_preview:
-                self.colors_inverted = not self.colors_inverted
-                is_valid = self.will_position_be_valid(new_x, new_y, self.endpoint)
-                self.colors_inverted = not self.colors_inverted
-                
-                if not is_valid:
-                    # Draw invalid move indicator
-                    pygame.draw.rect(cell_surface, INVALID_MOVE_COLOR, 
-                                   (0, 0, CELL_SIZE, CELL_SIZE))
-            
-            # Check if position is currently valid
+            # Check if position is currently valid; the danger indicator
+            # covers the whole cell, so it takes precedence
             if not self.will_position_be_valid(new_x, new_y, self.endpoint):
-                # Draw danger indicator
-                pygame.draw.rect(cell_surface, DANGER_COLOR,
-                               (0, 0, CELL_SIZE, CELL_SIZE))
-                pygame.draw.rect(cell_surface, DANGER_BORDER,
-                               (0, 0, CELL_SIZE, CELL_SIZE), 2)
+                cell_surface = self._danger_surface
+            elif preview:
+                # If showing contrast preview, check validity after contrast switch
+                if self.will_position_be_valid(new_x, new_y, self.endpoint, not self.colors_inverted):
+                    continue
+                cell_surface = self._invalid_surface
+            else:
+                continue
             
-            # Draw the indicator
-            surface.blit(cell_surface, 
-                        (new_x * CELL_SIZE, new_y * CELL_SIZE))
+            # Remember where the indicator goes
+            self._danger_blits.append((cell_surface, (new_x * CELL_SIZE, new_y * CELL_SIZE)))
+        
+        # Draw the indicators
+        surface.blits(self._danger_blits, doreturn=False)
+
+    def is_steady_frame(self):
+        """Check if nothing is drawn this frame outside the player, portal and blocks"""
+        return not (self.game_over or self.death_animation_timer > 0 or
+                    self.is_transitioning or self.showing_contrast_preview or
+                    self.is_level_transitioning or self.spawn_animation_timer > 0)
+
+    def menu_frame_key(self):
+        """Get everything a menu frame is drawn from, to tell when it would look different"""
+        return (self.menu_state, self.selected_menu_item, self.waiting_for_key,
+                self.sfx_volume, self.sfx_muted, self.music_volume, self.music_muted,
+                tuple(self._keybind_labels), self.animation_tick,
+                self._grid_surfaces[self.colors_inverted])
+
+    def gameplay_dirty_rects(self):
+        """Get the screen areas the player, portal and blocks are drawn in"""
+        px, py = self.player_pos
+        ex, ey = self.endpoint
+        rects = [self._player_areas[px][py], self._portal_areas[ex][ey]]
+        
+        # Blocks sit inside their cell; the margin covers fractional positions.
+        # Their areas are plain tuples, computed for all blocks at once
+        size = CELL_SIZE + 4
+        lefts = (self.block_x * CELL_SIZE - 2).tolist()
+        tops = ((self.block_y * CELL_SIZE).astype(np.intp) - 2).tolist()
+        rects.extend(zip(lefts, tops, [size] * len(lefts), [size] * len(lefts)))
+        return rects
 
     def reset_game_state(self):
         """Reset the entire game state to start over"""
         self.level = 1
         self.next_level = 1 
-        self.colors_inverted = False
+        self.set_colors_inverted(False)
         self.game_over = False
         self.game_over_alpha = 0
         self.death_animation_timer = 0
-        self.death_particles = []
+        self.set_death_particles([], [], [], [], [])
+        self._moves_made = False
         self.is_transitioning = False
         self.is_level_transitioning = True 
         self.level_transition_state = 'fadeout' 
@@ -1207,14 +1536,42 @@ class Game:
         self.transition_hold_timer = self.transition_hold_duration
         self.reset_game()
 
+    def render_text(self, font, text, color, alpha=255):
+        """Render antialiased text, reusing the surface rendered on earlier frames"""
+        key = (font, text, color)
+        text_surface = self._text_cache.get(key)
+        if text_surface is None:
+            text_surface = self._text_cache[key] = font.render(text, True, color).convert_alpha()
+        # Cached surfaces are shared, so every caller sets the alpha it needs
+        if text_surface.get_alpha() != alpha:
+            text_surface.set_alpha(alpha)
+        return text_surface
+
+    def render_text_centered(self, font, text, color, center, alpha=255):
+        """Render text like render_text, along with its shared rect centered on a point"""
+        text_surface = self.render_text(font, text, color, alpha)
+        key = (font, text, color, center)
+        text_rect = self._text_rects.get(key)
+        if text_rect is None:
+            text_rect = self._text_rects[key] = text_surface.get_rect(center=center)
+        return text_surface, text_rect
+
+    def forget_text(self, texts):
+        """Drop the cached surfaces, rects and menu layouts that show any of the given texts"""
+        self._text_cache = {key: surface for key, surface in self._text_cache.items()
+                            if key[1] not in texts}
+        self._text_rects = {key: rect for key, rect in self._text_rects.items()
+                            if key[1] not in texts}
+        self._menu_plans = {key: plan for key, plan in self._menu_plans.items()
+                            if texts.isdisjoint(key[0])}
+
     def draw_menu_text(self, text, font, color, y_pos, selected=False, disabled=False, center_x=None):
         """Helper method to draw menu text with optional selection highlight and custom x position"""
         if disabled:
-            color = tuple(c // 2 for c in color[:3]) + (color[3],) if len(color) > 3 else tuple(c // 2 for c in color)
-        text_surface = font.render(text, True, color)
+            color = _dim(color)
         if center_x is None:
             center_x = WINDOW_SIZE // 2
-        text_rect = text_surface.get_rect(center=(center_x, y_pos))
+        text_surface, text_rect = self.render_text_centered(font, text, color, (center_x, y_pos))
         
         if selected and not disabled:
             # Draw selection indicator
@@ -1228,11 +1585,56 @@ class Game:
         self.screen.blit(text_surface, text_rect)
         return text_rect
 
+    def draw_menu_items(self, menu_items, font, spacing, waiting=None):
+        """Draw a menu's items down the middle of the screen, highlighting the selected one"""
+        key = (tuple(menu_items), font, spacing, self.selected_menu_item, waiting)
+        plan = self._menu_plans.get(key)
+        if plan is None:
+            # Lay out each item's text and, for the selected one, its arrow
+            plan = []
+            start_y = WINDOW_SIZE // 2
+            for i, item in enumerate(menu_items):
+                is_selected = i == self.selected_menu_item
+                if i == waiting:
+                    text_color = MENU_SELECTED
+                else:
+                    text_color = MENU_HIGHLIGHT if is_selected else MENU_TEXT
+                y_pos = start_y + i * spacing
+                text_surface = self.render_text(font, item, text_color)
+                text_rect = text_surface.get_rect(center=(WINDOW_SIZE // 2, y_pos))
+                arrow_points = None
+                if is_selected:
+                    arrow_points = [
+                        (text_rect.left - 30, y_pos),
+                        (text_rect.left - 20, y_pos - 10),
+                        (text_rect.left - 20, y_pos + 10)
+                    ]
+                plan.append((text_surface, text_rect, arrow_points))
+            self._menu_plans[key] = plan
+        
+        for text_surface, text_rect, arrow_points in plan:
+            if arrow_points is not None:
+                pygame.draw.polygon(self.screen, MENU_SELECTED, arrow_points)
+            # Text surfaces are shared with other callers, so reset the alpha
+            if text_surface.get_alpha() != 255:
+                text_surface.set_alpha(255)
+            self.screen.blit(text_surface, text_rect)
+
+    def menu_backdrop(self):
+        """Get the dimmed grid every menu is drawn over, as one opaque surface"""
+        # Menus always sit on the current grid, so blend the translucent
+        # backdrop into it once rather than on every menu frame
+        grid_surface = self._grid_surfaces[self.colors_inverted]
+        shown_grid, backdrop = self._menu_backdrop
+        if shown_grid is not grid_surface:
+            backdrop = grid_surface.copy()
+            backdrop.blit(self._menu_bg, (0, 0))
+            self._menu_backdrop = (grid_surface, backdrop)
+        return backdrop
+
     def draw_intro_menu(self):
         """Draw the intro menu"""
-        bg_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        bg_surface.fill(MENU_BG)
-        self.screen.blit(bg_surface, (0, 0))
+        self.screen.blit(self.menu_backdrop(), (0, 0))
         
         # Title
         self.draw_menu_text("The Inverse Path", self.title_font, MENU_TITLE, WINDOW_SIZE // 4)
@@ -1244,37 +1646,23 @@ class Game:
             "Options",
             "Quit"
         ]
-        start_y = WINDOW_SIZE // 2
-        spacing = 60
-        
-        for i, item in enumerate(menu_items):
-            self.draw_menu_text(item, self.menu_font, MENU_TEXT if i != self.selected_menu_item else MENU_HIGHLIGHT,
-                              start_y + i * spacing, selected=(i == self.selected_menu_item))
+        self.draw_menu_items(menu_items, self.menu_font, 60)
 
     def draw_pause_menu(self):
         """Draw the pause menu"""
         # Draw game state in background (dimmed)
-        bg_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        bg_surface.fill(MENU_BG)
-        self.screen.blit(bg_surface, (0, 0))
+        self.screen.blit(self.menu_backdrop(), (0, 0))
         
         # Draw "PAUSED" text
         self.draw_menu_text("PAUSED", self.title_font, MENU_TITLE, WINDOW_SIZE // 3)
         
         # Menu items
         menu_items = ["Resume", "Options", "Quit to Menu"]
-        start_y = WINDOW_SIZE // 2
-        spacing = 60
-        
-        for i, item in enumerate(menu_items):
-            self.draw_menu_text(item, self.menu_font, MENU_TEXT if i != self.selected_menu_item else MENU_HIGHLIGHT,
-                              start_y + i * spacing, selected=(i == self.selected_menu_item))
+        self.draw_menu_items(menu_items, self.menu_font, 60)
 
     def draw_options_menu(self):
         """Draw the options menu"""
-        bg_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        bg_surface.fill(MENU_BG)
-        self.screen.blit(bg_surface, (0, 0))
+        self.screen.blit(self.menu_backdrop(), (0, 0))
         
         # Title
         self.draw_menu_text("Options", self.title_font, MENU_TITLE, WINDOW_SIZE // 4)
@@ -1286,41 +1674,17 @@ class Game:
             "Keybindings",
             "Back"
         ]
-        start_y = WINDOW_SIZE // 2
-        spacing = 60
-        
-        for i, item in enumerate(menu_items):
-            self.draw_menu_text(item, self.menu_font, MENU_TEXT if i != self.selected_menu_item else MENU_HIGHLIGHT,
-                              start_y + i * spacing, selected=(i == self.selected_menu_item))
+        self.draw_menu_items(menu_items, self.menu_font, 60)
 
     def draw_keybind_menu(self):
         """Draw the key rebinding menu"""
-        bg_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        bg_surface.fill(MENU_BG)
-        self.screen.blit(bg_surface, (0, 0))
+        self.screen.blit(self.menu_backdrop(), (0, 0))
         
         # Title
         self.draw_menu_text("Keybindings", self.title_font, MENU_TITLE, WINDOW_SIZE // 4)
         
-        # Create menu items from keybindings
-        menu_items = []
-        for action, keys in self.keybindings.items():
-            if isinstance(keys, list):
-                key_names = [pygame.key.name(k).upper() for k in keys]
-                menu_items.append(f"{action.title()}: {' or '.join(key_names)}")
-            else:
-                menu_items.append(f"{action.title()}: {pygame.key.name(keys).upper()}")
-        menu_items.append("Back")
-        
-        start_y = WINDOW_SIZE // 2
-        spacing = 45
-        
-        for i, item in enumerate(menu_items):
-            is_selected = i == self.selected_menu_item
-            is_waiting = self.waiting_for_key is not None and i == self.waiting_for_key
-            text_color = MENU_SELECTED if is_waiting else (MENU_HIGHLIGHT if is_selected else MENU_TEXT)
-            self.draw_menu_text(item, self.submenu_font, text_color,
-                              start_y + i * spacing, selected=is_selected)
+        # Menu items are the keybinding labels, rebuilt whenever a key is rebound
+        self.draw_menu_items(self._keybind_labels, self.submenu_font, 45, waiting=self.waiting_for_key)
 
     def handle_menu_input(self, event):
         """Handle menu navigation and selection"""
@@ -1419,7 +1783,7 @@ class Game:
             elif self.selected_menu_item == 1:
                 self.music_muted = not self.music_muted
                 self.music_gen.set_muted(self.music_muted)
-                if not self.music_muted and not self.music_thread.is_alive():
+                if not self.music_muted and not self.is_music_playing():
                     self.start_background_music()
             elif self.selected_menu_item == 2:
                 self.menu_state = MENU_KEYBIND
@@ -1451,6 +1815,11 @@ class Game:
                     self.keybindings[action] = [event.key]
                 else:
                     self.keybindings[action] = event.key
+                self.update_direction_table()
+                old_labels = set(self._keybind_labels)
+                self.update_keybind_labels()
+                self.forget_text(old_labels - set(self._keybind_labels))
+                self.update_key_actions()
             self.waiting_for_key = None
 
     def get_key_name(self, key_or_list):
@@ -1462,9 +1831,7 @@ class Game:
     def draw_tutorial_menu(self):
         """Draw the tutorial/help menu with visual examples and explanations"""
         # Draw background
-        bg_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-        bg_surface.fill(MENU_BG)
-        self.screen.blit(bg_surface, (0, 0))
+        self.screen.blit(self.menu_backdrop(), (0, 0))
         
         # Title
         self.draw_menu_text("How to Play", self.title_font, MENU_TITLE, 60)
@@ -1524,7 +1891,7 @@ class Game:
         self.draw_menu_text("Color Switching", self.menu_font, MENU_SECTION_TITLE, current_y)
         current_y += 40
         # Contrast description (left side)
-        contrast_desc = f"Press {self.get_key_name(self.keybindings['contrast'])} to"
+        contrast_desc = f"Press {self._key_labels['contrast']} to"
         contrast_desc2 = "invert black and white blocks."
         contrast_desc3 = "You can move on white spaces."
         text_y = current_y + PLAYER_SIZE // 2
@@ -1550,17 +1917,17 @@ class Game:
             # First stop all game processes
             self._is_shutting_down = True
             
-            # Stop the music thread first
-            if self.music_thread and self.music_thread.is_alive():
+            # Stop the current song first; its thread is a daemon and winds
+            # itself down, so quitting doesn't wait on it
+            if self.music_gen and self.is_music_playing():
                 try:
-                    self.music_stop_event.set()
-                    self.music_thread.join(timeout=0.5)
+                    self.music_gen.stop_event.set()
                 except:
                     pass
 
             # Clear all game objects that might try to use Pygame
-            self.falling_blocks = []
-            self.death_particles = []
+            self.set_falling_blocks([], [], [])
+            self.set_death_particles([], [], [], [], [])
             self.spawn_rings = []
             
             # Stop all sounds before cleaning up pygame
@@ -1578,8 +1945,6 @@ class Game:
             # Clear sound objects
             self.sound_effects = None
             self.music_gen = None
-            self.music_thread = None
-            self.music_stop_event = None
             
         except Exception as e:
             print(f"Error during game cleanup: {e}")
@@ -1603,7 +1968,7 @@ class Game:
             
             # Clear any ongoing animations
             self.death_animation_timer = 0
-            self.death_particles = []
+            self.set_death_particles([], [], [], [], [])
             self.spawn_rings = []
             
         except Exception as e:
@@ -1622,6 +1987,16 @@ class Game:
                     if event.type == pygame.QUIT:
                         running = False
                         break
+                    elif event.type == SONG_END_EVENT:
+                        # Keep the music going with a new song
+                        if not self._is_shutting_down:
+                            self.music_gen.play_song()
+                    elif event.type in WINDOW_REPAINT_EVENTS:
+                        # The window was covered, restored or resized, so its
+                        # contents can't be trusted to still be on screen: redraw
+                        # and present the whole window, even for an unchanged menu
+                        self._dirty_rects = None
+                        self._shown_menu_key = None
                     elif self.menu_state != MENU_GAME:
                         # Handle menu input
                         if self.waiting_for_key is not None:
@@ -1631,21 +2006,14 @@ class Game:
                     else:
                         # Game input handling
                         if event.type == pygame.KEYDOWN:
-                            if event.key == self.keybindings["pause"]:
-                                self.menu_state = MENU_PAUSE
-                                self.selected_menu_item = 0
-                            elif event.key == self.keybindings["restart"] and self.game_over:
-                                self.reset_game_state()
-                            elif event.key == self.keybindings["contrast"] and not self.is_transitioning and not self.game_over:
-                                self.showing_contrast_preview = True
-                                self.preview_alpha = 0
+                            for action in self._keydown_actions.get(event.key, ()):
+                                if action():
+                                    break
                         elif event.type == pygame.KEYUP:
                             if event.key == self.keybindings["contrast"]:
                                 if self.showing_contrast_preview and not self.game_over:
                                     self.showing_contrast_preview = False
-                                    self.colors_inverted = not self.colors_inverted
                                     trapped_after_switch = self.check_player_trapped_after_transition()
-                                    self.colors_inverted = not self.colors_inverted
 
                                     if not trapped_after_switch:
                                         self.is_transitioning = True
@@ -1655,43 +2023,44 @@ class Game:
 
                 if not running:
                     break
+                
+                # Menus are drawn from a handful of settings, so while none of
+                # them change the menu on screen is left as it is
+                if self.menu_state != MENU_GAME:
+                    menu_key = self.menu_frame_key()
+                    if menu_key == self._shown_menu_key:
+                        self.clock.tick(FPS)
+                        continue
+                    self._shown_menu_key = menu_key
+                else:
+                    self._shown_menu_key = None
                     
-                # Draw the base game state
-                self.screen.fill(BLACK if self.colors_inverted else WHITE)
+                dirty_rects = None
                 
-                # Draw grid
-                for x in range(GRID_SIZE):
-                    for y in range(GRID_SIZE):
-                        cell_color = WHITE if self.grid[x][y] != self.colors_inverted else BLACK
-                        pygame.draw.rect(self.screen, cell_color, 
-                                       (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-                        pygame.draw.rect(self.screen, GRID_COLOR, 
-                                       (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
+                # Draw the base game state: the pre-rendered grid covers the whole window
+                grid_surface = self._grid_surfaces[self.colors_inverted]
+                if grid_surface is not self._shown_grid_surface:
+                    # The whole window changes when the grid does
+                    self._dirty_rects = None
+                    self._shown_grid_surface = grid_surface
+                if self.menu_state != MENU_GAME:
+                    # Menus cover the window with their backdrop, which already
+                    # has the grid composited into it
+                    pass
+                elif self._dirty_rects is not None:
+                    # Last frame only drew inside its dirty areas and the rest of
+                    # the window still shows the grid, so only those need erasing
+                    self.screen.blits([(grid_surface, rect, rect) for rect in self._dirty_rects],
+                                      doreturn=False)
+                else:
+                    self.screen.blit(grid_surface, (0, 0))
 
                 if self.menu_state == MENU_GAME:
                     # Game state updates
                     if not self.game_over:
                         # Handle continuous movement
-                        keys = pygame.key.get_pressed()
-                        moved = False
                         if not (self.is_transitioning or self.showing_contrast_preview or self.movement_locked):
-                            if self.movement_delay <= 0:
-                                for direction, key_list in [
-                                    ("left", [pygame.K_LEFT, pygame.K_a]),
-                                    ("right", [pygame.K_RIGHT, pygame.K_d]),
-                                    ("up", [pygame.K_UP, pygame.K_w]),
-                                    ("down", [pygame.K_DOWN, pygame.K_s])
-                                ]:
-                                    if any(keys[k] for k in self.keybindings[direction]):
-                                        dx = 1 if direction == "right" else -1 if direction == "left" else 0
-                                        dy = 1 if direction == "down" else -1 if direction == "up" else 0
-                                        self.handle_movement(dx, dy)
-                                        moved = True
-
-                                if moved:
-                                    self.movement_delay = self.movement_cooldown
-                            else:
-                                self.movement_delay -= 1
+                            self.handle_continuous_movement()
 
                         # Update falling blocks
                         blocks_still_transitioning = self.update_falling_blocks()
@@ -1708,12 +2077,12 @@ class Game:
                         if self.is_transitioning:
                             self.transition_alpha += self.transition_speed
                             if self.transition_alpha >= 100:
-                                self.colors_inverted = not self.colors_inverted
+                                self.set_colors_inverted(not self.colors_inverted)
                                 self.transition_alpha = 0
                                 self.is_transitioning = False
-                                for block in self.falling_blocks:
-                                    block.falling = True
-                                    block.y_velocity = 0
+                                self.block_falling[:] = True
+                                self.block_vy[:] = 0
+                                self.reset_block_cells()
                                 blocks_settling = True
                                 self.movement_locked = True
 
@@ -1746,6 +2115,11 @@ class Game:
                             self.next_level = self.level + 1
                             self.transition_hold_timer = self.transition_hold_duration
 
+                    # Without full-window effects on screen, only the areas around the
+                    # player, the portal and the blocks change from frame to frame
+                    if self.is_steady_frame():
+                        dirty_rects = self.gameplay_dirty_rects()
+
                     # Draw game elements
                     self.draw_spawn_animation(self.screen)
                     endpoint_x = self.endpoint[0] * CELL_SIZE + CELL_SIZE // 2
@@ -1753,11 +2127,13 @@ class Game:
                     self.draw_glow(self.screen, (endpoint_x, endpoint_y), ENDPOINT_GLOW, PLAYER_SIZE)
                     self.draw_portal(self.screen, endpoint_x, endpoint_y, self.animation_tick)
 
-                    for block in self.falling_blocks:
-                        block_rect = pygame.Rect(block.x * CELL_SIZE + 4,
-                                               block.y * CELL_SIZE + 4,
-                                               PLAYER_SIZE, PLAYER_SIZE)
-                        self.draw_rounded_rect(self.screen, BLOCK_COLOR, block_rect, 5)
+                    # Blit every block in one call, truncating positions to
+                    # whole pixels like a Rect would
+                    block_xs = (self.block_x * CELL_SIZE + 4).tolist()
+                    block_ys = (self.block_y * CELL_SIZE + 4).astype(np.intp).tolist()
+                    block_sprite = self._block_sprite
+                    self.screen.blits([(block_sprite, position) for position in zip(block_xs, block_ys)],
+                                      doreturn=False)
 
                     self.draw_direction_indicator(self.screen)
                     self.draw_danger_indicators(self.screen)
@@ -1770,10 +2146,11 @@ class Game:
                     self.draw_movement_lock_indicator(self.screen)
 
                     if self.showing_contrast_preview:
-                        preview_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-                        preview_color = (*DANGER_COLOR[:3], self.preview_alpha)
-                        preview_surface.fill(preview_color)
-                        self.screen.blit(preview_surface, (0, 0))
+                        if self._preview_surface_alpha != self.preview_alpha:
+                            preview_color = (*DANGER_COLOR[:3], self.preview_alpha)
+                            self.preview_surface.fill(preview_color)
+                            self._preview_surface_alpha = self.preview_alpha
+                        self.screen.blit(self.preview_surface, (0, 0))
 
                     if self.is_transitioning:
                         self.transition_surface.fill((255, 255, 255, self.transition_alpha))
@@ -1804,7 +2181,13 @@ class Game:
                 elif self.menu_state == MENU_TUTORIAL:
                     self.draw_tutorial_menu()
 
-                pygame.display.flip()
+                # Push only the changed areas to the display when this frame and the
+                # last one were both steady, otherwise the whole window
+                if dirty_rects is not None and self._dirty_rects is not None:
+                    pygame.display.update(self._dirty_rects + dirty_rects)
+                else:
+                    pygame.display.flip()
+                self._dirty_rects = dirty_rects
                 self.clock.tick(FPS)
 
         except Exception as e:
@@ -1,9 +1,15 @@
 import pygame
 import random
 import time
-import math
 import numpy as np
-from threading import Thread, Event, Lock
+from itertools import accumulate
+from threading import Thread, Event
+
+# Posted to the event queue when a song plays through to its end
+SONG_END_EVENT = pygame.event.custom_type()
+
+# Mixer channels set aside for the music; sound effects play on the rest
+MUSIC_CHANNELS = 24
 
 def _is_mixer_available():
     """Check if the mixer is available and initialized"""
@@ -12,11 +18,23 @@ def _is_mixer_available():
     except:
         return False
 
+def _make_stereo_sound(wave):
+    """Make a sound playing the given mono wave on both channels"""
+    # Convert to 16-bit straight into both columns of the stereo buffer
+    stereo = np.empty((len(wave), 2), dtype=np.int16)
+    stereo[:] = wave[:, None]
+    return pygame.sndarray.make_sound(stereo)
+
 class MusicGenerator:
     def __init__(self):
         pygame.mixer.init(frequency=44100, channels=2)
         pygame.mixer.set_num_channels(32)  # Increased number of channels
         
+        # Keep the music on its own channels, so volume changes only touch those
+        pygame.mixer.set_reserved(MUSIC_CHANNELS)
+        self.channels = [pygame.mixer.Channel(i) for i in range(MUSIC_CHANNELS)]
+        self.next_channel = 0
+        
         # Define genres and their characteristics
         self.genres = {
             'electronic': {
@@ -358,8 +376,19 @@ class MusicGenerator:
             'hihat': None
         }
         
+        # The music's own random sources, kept apart from the game's
+        self.rng = random.Random()
+        self.np_rng = np.random.default_rng()
+        
         # Cache for generated tones
         self.tone_cache = {}
+        
+        # Cache for each chord's voicings and consonant melody notes, and the
+        # melody's next-note choices
+        self.voicing_cache = {}
+        self.consonant_cache = {}
+        self.consonant_index_cache = {}
+        self.melody_choice_cache = {}
         self.max_cache_size = 1000
 
         self.volume = 0.5
@@ -372,11 +401,9 @@ class MusicGenerator:
         self.volume = max(0.0, min(1.0, volume))
         actual_volume = 0.0 if self.is_muted else self.volume
         
-        # Set volume for all active channels
-        for i in range(pygame.mixer.get_num_channels()):
-            channel = pygame.mixer.Channel(i)
-            if channel.get_busy():
-                channel.set_volume(actual_volume)
+        # Set volume for all music channels
+        for channel in self.channels:
+            channel.set_volume(actual_volume)
     
     def set_muted(self, muted):
         """Set muted state for music"""
@@ -384,50 +411,62 @@ class MusicGenerator:
         self.set_volume(self.volume)
 
     def apply_envelope(self, samples, attack=0.1, decay=0.2, sustain=0.7, release=0.4):
-        """Apply ADSR envelope to a sample array"""
+        """Apply ADSR envelope to a sample array, scaling it in place"""
         num_samples = len(samples)
-        envelope = np.ones(num_samples)
+        dtype = samples.dtype
         
         attack_samples = int(attack * num_samples)
         decay_samples = int(decay * num_samples)
         release_samples = int(release * num_samples)
         
+        # Where the phases overlap, the release phase takes over
+        sustain_end = num_samples - release_samples
+        attack_end = min(attack_samples, sustain_end)
+        decay_end = min(attack_samples + decay_samples, sustain_end)
+        
         # Attack phase
-        if attack_samples > 0:
-            envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
+        samples[:attack_end] *= np.linspace(0, 1, attack_samples, dtype=dtype)[:attack_end]
         
         # Decay phase
-        if decay_samples > 0:
-            decay_end = attack_samples + decay_samples
-            envelope[attack_samples:decay_end] = np.linspace(1, sustain, decay_samples)
+        decay_ramp = np.linspace(1, sustain, decay_samples, dtype=dtype)
+        samples[attack_samples:decay_end] *= decay_ramp[:max(0, decay_end - attack_samples)]
         
         # Sustain phase is handled by the sustain level
-        sustain_end = num_samples - release_samples
-        envelope[decay_end:sustain_end] = sustain
+        samples[decay_end:sustain_end] *= sustain
         
         # Release phase
-        if release_samples > 0:
-            envelope[sustain_end:] = np.linspace(sustain, 0, release_samples)
+        samples[sustain_end:] *= np.linspace(sustain, 0, release_samples, dtype=dtype)
         
-        return samples * envelope
+        return samples
 
     def generate_harmonic_content(self, frequency, duration, harmonics):
         """Generate a tone with specific harmonic content"""
         num_samples = int(duration * self.sample_rate)
-        t = np.linspace(0, duration, num_samples)
-        wave = np.zeros(num_samples)
         
-        for harmonic, amplitude in harmonics.items():
-            wave += amplitude * np.sin(2.0 * np.pi * frequency * harmonic * t)
+        # The fundamental's phase is worked out in double precision and wrapped
+        # to a single turn, which is exact enough to carry on in single precision;
+        # harmonics are whole multiples, so their phases can be wrapped the same way
+        fundamental = np.arange(num_samples) * (2.0 * np.pi * frequency / self.sample_rate)
+        np.remainder(fundamental, 2.0 * np.pi, out=fundamental)
+        fundamental = fundamental.astype(np.float32)
+        
+        # Work out every harmonic's phases in one array, one row per harmonic,
+        # then take the sines in place and weight the rows into a single wave
+        multiples = np.fromiter(harmonics.keys(), dtype=np.float32)
+        amplitudes = np.fromiter(harmonics.values(), dtype=np.float32)
+        phases = np.multiply.outer(multiples, fundamental)
+        np.sin(phases, out=phases)
         
-        return wave
+        return amplitudes @ phases
 
     def generate_melody_tone(self, frequency, duration, amplitude=4096, genre='chill'):
         """Generate a tone with genre-appropriate timbre"""
-        # Check cache first
-        cache_key = f"melody_{frequency}_{duration}_{amplitude}_{genre}"
-        if cache_key in self.tone_cache:
-            return self.tone_cache[cache_key]
+        # Check cache first; rounding lets durations worked out by arithmetic
+        # share the tone of the same note length
+        cache_key = ('melody', round(frequency, 2), round(duration, 3), amplitude, genre)
+        sound = self.tone_cache.get(cache_key)
+        if sound is not None:
+            return sound
             
         # Apply genre-specific volume scaling
         if genre in self.genres:
@@ -486,11 +525,9 @@ class MusicGenerator:
         
         # Normalize and scale
         amplitude = amplitude * (0.8 if genre == 'ambient' else 0.7)  # Softer for ambient
-        wave = wave * (amplitude / np.max(np.abs(wave)))
+        wave *= amplitude / max(wave.max(), -wave.min())
         
-        samples = wave.astype(np.int16)
-        stereo = np.column_stack((samples, samples))
-        sound = pygame.sndarray.make_sound(stereo)
+        sound = _make_stereo_sound(wave)
         
         # Cache the result
         if len(self.tone_cache) < self.max_cache_size:
@@ -504,12 +541,6 @@ class MusicGenerator:
             return None
             
         try:
-            # Check cache first
-            cache_key = f"harmony_{frequency}_{duration}_{amplitude}"
-            if cache_key in self.tone_cache:
-                return self.tone_cache[cache_key]
-            
-            # Generate if not in cache
             harmonics = {
                 1.0: 1.0,    # Fundamental
                 2.0: 0.3,    # Octave
@@ -527,36 +558,31 @@ class MusicGenerator:
             
             # Reduce overall amplitude for harmony
             amplitude = amplitude * 0.5
-            wave = wave * (amplitude / np.max(np.abs(wave)))
+            wave *= amplitude / max(wave.max(), -wave.min())
             
-            samples = wave.astype(np.int16)
-            stereo = np.column_stack((samples, samples))
-            sound = pygame.sndarray.make_sound(stereo)
-            
-            # Cache the result
-            if len(self.tone_cache) < self.max_cache_size:
-                self.tone_cache[cache_key] = sound
-            
-            return sound
+            return _make_stereo_sound(wave)
         except:
             return None
 
     def generate_drum_sound(self, type='kick', volume_scale=1.0):
         """Generate different types of drum sounds with more realistic timbres and volume control"""
+        # Check cache first; each genre's drum kit is shared by all its songs
+        cache_key = ('drum', type, volume_scale)
+        sound = self.tone_cache.get(cache_key)
+        if sound is not None:
+            return sound
+            
         duration = 0.1 if type != 'hihat' else 0.05
         num_samples = int(duration * self.sample_rate)
         buffer = []
         
         if type == 'kick':
             # Start with higher frequency for attack
-            freq = 150
-            t = np.linspace(0, duration, num_samples)
-            wave = np.zeros(num_samples)
+            t = np.arange(num_samples) / self.sample_rate
             
-            # Frequency sweep
-            for i in range(num_samples):
-                freq = max(40, freq * 0.9)
-                wave[i] = math.sin(2.0 * math.pi * freq * t[i])
+            # Frequency sweep, dropping 10% per sample from 150Hz down to 40Hz
+            freq = np.maximum(40, 150 * np.power(0.9, np.arange(1, num_samples + 1)))
+            wave = np.sin(2.0 * np.pi * freq * t)
             
             # Add some distortion and compression for punch
             wave = np.clip(wave * 2.0, -1, 1)
@@ -568,13 +594,13 @@ class MusicGenerator:
             
         elif type == 'snare':
             # Mix sine wave and noise
-            t = np.linspace(0, duration, num_samples)
+            t = np.arange(num_samples) / self.sample_rate
             
             # Main body (sine wave at 200Hz)
             sine = np.sin(2.0 * np.pi * 200 * t)
             
             # Noise component with more high-end
-            noise = np.random.uniform(-1, 1, num_samples)
+            noise = self.np_rng.uniform(-1, 1, num_samples)
             noise_hp = np.sin(2.0 * np.pi * 1000 * t) * noise  # High-pass filtered noise
             
             # Mix and shape with more noise
@@ -584,29 +610,68 @@ class MusicGenerator:
             
         else:  # hihat
             # High-frequency noise with resonant filter simulation
-            noise = np.random.uniform(-1, 1, num_samples)
+            noise = self.np_rng.uniform(-1, 1, num_samples)
             
             # Apply band-pass filter effect (simplified)
-            t = np.linspace(0, duration, num_samples)
+            t = np.arange(num_samples) / self.sample_rate
             resonance = np.sin(2.0 * np.pi * 3000 * t)  # Higher frequency
             wave = noise * resonance
             
             # Add some high-frequency sizzle
-            sizzle = np.sin(2.0 * np.pi * 5000 * t) * np.random.uniform(-0.5, 0.5, num_samples)
+            sizzle = np.sin(2.0 * np.pi * 5000 * t) * self.np_rng.uniform(-0.5, 0.5, num_samples)
             wave = 0.7 * wave + 0.3 * sizzle
             
             # Sharp attack, quick decay
             wave = self.apply_envelope(wave, attack=0.01, decay=0.05, sustain=0.1, release=0.05)
             buffer = wave * (6144 * volume_scale)  # Apply volume scaling
 
-        samples = np.array(buffer).astype(np.int16)
-        stereo = np.column_stack((samples, samples))
-        return pygame.sndarray.make_sound(stereo)
+        sound = _make_stereo_sound(np.asarray(buffer))
+        
+        # Cache the sound
+        if len(self.tone_cache) < self.max_cache_size:
+            self.tone_cache[cache_key] = sound
+            
+        return sound
 
-    def get_chord_notes(self, root_note, chord_type='major'):
-        """Get the notes for a chord based on root note with different voicings"""
-        root_freq = self.notes[root_note]
+    def render_drum_bar(self, drums, step_duration, steps_per_bar=16):
+        """Mix one bar of a drum pattern into a single sound"""
+        # Mono samples of each drum, as generated for this song
+        hits = {drum_type: pygame.sndarray.array(sound)[:, 0]
+                for drum_type, sound in self.drum_sounds.items() if drum_type in drums}
+        
+        # Leave room after the bar for the last hits to ring out
+        step_samples = step_duration * self.sample_rate
+        tail = max((len(hit) for hit in hits.values()), default=0)
+        bar = np.zeros(int(step_samples * steps_per_bar) + tail, dtype=np.int32)
         
+        # Add each hit in at the start of its step
+        for drum_type, hit in hits.items():
+            hit_steps = np.flatnonzero(np.asarray(drums[drum_type][:steps_per_bar], dtype=bool))
+            for step in hit_steps.tolist():
+                start = int(step * step_samples)
+                bar[start:start + len(hit)] += hit
+        
+        return _make_stereo_sound(np.clip(bar, -32768, 32767))
+
+    def get_chord_notes(self, root_note, chord_type='major', avoid=None):
+        """Get the notes for a chord based on root note with different voicings, other than avoid"""
+        # The voicings only depend on the chord, so work them out once
+        voicings = self.voicing_cache.get((root_note, chord_type))
+        if voicings is None:
+            voicings = self.voicing_cache[root_note, chord_type] = self.get_chord_voicings(root_note, chord_type)
+        
+        # Choose a random voicing, weighted towards more consonant options
+        weights = [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]  # Root position slightly preferred
+        
+        # Leave out the voicing to avoid, so one draw always finds another
+        if avoid is not None:
+            options = [(voicing, weight) for voicing, weight in zip(voicings, weights) if voicing != avoid]
+            if options:
+                voicings, weights = zip(*options)
+        return self.rng.choices(voicings, weights=weights)[0]
+
+    def get_chord_voicings(self, root_note, chord_type='major'):
+        """Get the frequencies of each voicing of a chord based on root note"""
         # Get the note name without octave
         note_name = root_note[:-1]
         octave = int(root_note[-1])
@@ -658,12 +723,28 @@ class MusicGenerator:
             [self.notes[valid_notes[1]], self.notes[valid_notes[0]], self.notes[valid_notes[4]]]
         ]
         
-        # Choose a random voicing, weighted towards more consonant options
-        weights = [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]  # Root position slightly preferred
-        return random.choices(voicings, weights=weights)[0]
+        return voicings
 
     def get_consonant_notes(self, chord_degree):
         """Get a list of notes that sound consonant with the given chord"""
+        # The notes only depend on the chord, so work them out once
+        consonant_notes = self.consonant_cache.get(chord_degree)
+        if consonant_notes is None:
+            consonant_notes = self.consonant_cache[chord_degree] = tuple(self.find_consonant_notes(chord_degree))
+        return consonant_notes
+
+    def get_consonant_note_indices(self, chord_degree):
+        """Get where each consonant note of the given chord first appears in its sorted notes"""
+        note_indices = self.consonant_index_cache.get(chord_degree)
+        if note_indices is None:
+            note_indices = {}
+            for i, note in enumerate(self.get_consonant_notes(chord_degree)):
+                note_indices.setdefault(note, i)
+            self.consonant_index_cache[chord_degree] = note_indices
+        return note_indices
+
+    def find_consonant_notes(self, chord_degree):
+        """Work out the notes that sound consonant with the given chord, sorted by pitch"""
         chord_notes = self.scale_degrees[chord_degree]
         
         # Add passing tones and neighboring tones that work well
@@ -694,6 +775,38 @@ class MusicGenerator:
         
         return consonant_notes
 
+    def get_melody_choices(self, consonant_notes, chord_degree, current_idx, strong_beat, max_interval):
+        """Get the indices of the notes the melody can move to next, with their cumulative weights"""
+        possible_indices = []
+        weights = []
+        
+        for i in range(len(consonant_notes)):
+            interval = i - current_idx
+            
+            # Skip if interval is too large
+            if abs(interval) > max_interval:
+                continue
+            
+            # Calculate weight based on several factors
+            weight = 1.0
+            
+            # Very strong preference for stepwise motion
+            if abs(interval) == 1:
+                weight *= 3.0
+            elif interval == 0:
+                weight *= 1.5
+            else:
+                weight *= 0.5
+            
+            # Prefer chord tones on strong beats
+            if strong_beat and consonant_notes[i] in self.scale_degrees[chord_degree]:
+                weight *= 2.0
+            
+            possible_indices.append(i)
+            weights.append(weight)
+        
+        return possible_indices, list(accumulate(weights))
+
     def generate_melody(self, progression, note_length_weights=None, step_preference=0.5):
         """Generate a melody that fits our time signature and chord progression"""
         if note_length_weights is None:
@@ -703,6 +816,11 @@ class MusicGenerator:
                 (4.0, 0.1)    # whole notes
             ]
         
+        # Note lengths and their cumulative weights, for strong beats and the rest
+        strong_lengths, strong_cum_weights = (1.0, 2.0), (0.7, 1.0)
+        lengths = [length for length, _ in note_length_weights]
+        length_cum_weights = list(accumulate(weight for _, weight in note_length_weights))
+        
         melody = []
         total_beats = self.beats_per_bar * self.bars_per_phrase
         current_beat = 0
@@ -731,7 +849,7 @@ class MusicGenerator:
         
         while current_beat < total_beats:
             # Add rests between phrases for breathing room
-            if phrase_length >= 4 and random.random() < rest_chance:
+            if phrase_length >= 4 and self.rng.random() < rest_chance:
                 rest_length = 1.0
                 melody.append((None, rest_length))
                 current_beat += rest_length
@@ -746,45 +864,25 @@ class MusicGenerator:
             
             # Get consonant notes for this chord
             consonant_notes = self.get_consonant_notes(current_chord)
-            current_idx = consonant_notes.index(last_note) if last_note in consonant_notes else -1
+            current_idx = self.get_consonant_note_indices(current_chord).get(last_note, -1)
             
             # Possibly repeat the last note (increased chance for singability)
-            if random.random() < repetition_chance and repeated_notes_count < 2:
+            if self.rng.random() < repetition_chance and repeated_notes_count < 2:
                 note = last_note
                 repeated_notes_count += 1
             else:
-                # Choose next note with strong preference for stepwise motion
-                possible_indices = []
-                weights = []
-                
-                for i in range(len(consonant_notes)):
-                    interval = i - current_idx
-                    
-                    # Skip if interval is too large
-                    if abs(interval) > max_interval:
-                        continue
-                    
-                    # Calculate weight based on several factors
-                    weight = 1.0
-                    
-                    # Very strong preference for stepwise motion
-                    if abs(interval) == 1:
-                        weight *= 3.0
-                    elif interval == 0:
-                        weight *= 1.5
-                    else:
-                        weight *= 0.5
-                    
-                    # Prefer chord tones on strong beats
-                    note = consonant_notes[i]
-                    if current_beat % 2 == 0 and note in self.scale_degrees[current_chord]:
-                        weight *= 2.0
-                    
-                    possible_indices.append(i)
-                    weights.append(weight)
+                # Choose next note with strong preference for stepwise motion;
+                # the choices only depend on the chord, the last note and the beat
+                strong_beat = current_beat % 2 == 0
+                choice_key = (current_chord, current_idx, strong_beat, max_interval)
+                choices = self.melody_choice_cache.get(choice_key)
+                if choices is None:
+                    choices = self.melody_choice_cache[choice_key] = self.get_melody_choices(
+                        consonant_notes, current_chord, current_idx, strong_beat, max_interval)
+                possible_indices, cum_weights = choices
                 
                 if possible_indices:
-                    chosen_idx = random.choices(possible_indices, weights=weights)[0]
+                    chosen_idx = self.rng.choices(possible_indices, cum_weights=cum_weights)[0]
                     note = consonant_notes[chosen_idx]
                     repeated_notes_count = 0
                 else:
@@ -793,9 +891,9 @@ class MusicGenerator:
             # Choose note length based on position in phrase
             if current_beat % 4 == 0:
                 # Prefer longer notes on strong beats
-                length, _ = random.choices([(1.0, 0.7), (2.0, 0.3)], weights=[0.7, 0.3])[0]
+                length = self.rng.choices(strong_lengths, cum_weights=strong_cum_weights)[0]
             else:
-                length, _ = random.choices(note_length_weights, weights=[w for _, w in note_length_weights])[0]
+                length = self.rng.choices(lengths, cum_weights=length_cum_weights)[0]
             
             # Adjust length if we're near the end of the phrase
             if current_beat + length > total_beats:
@@ -811,7 +909,7 @@ class MusicGenerator:
     def generate_song_structure(self):
         """Generate a complete song structure with different sections"""
         genre_info = self.genres[self.current_genre]
-        structure = random.choice(genre_info['structures'])
+        structure = self.rng.choice(genre_info['structures'])
         
         # Generate and store melodies for each section type
         section_melodies = {}
@@ -820,7 +918,7 @@ class MusicGenerator:
         
         # First pass: Generate melodies and progressions for each unique section type
         for section_type in set(structure):
-            base_progression = random.choice(self.section_progressions[section_type])
+            base_progression = self.rng.choice(self.section_progressions[section_type])
             section_progressions[section_type] = base_progression
             
             # Generate melody with genre-appropriate parameters
@@ -838,7 +936,7 @@ class MusicGenerator:
                 section_drums[section_type] = self.section_drums[section_type]
             else:
                 # Use genre-appropriate drum styles
-                section_drums[section_type] = [random.choice(genre_info['drum_styles'])]
+                section_drums[section_type] = [self.rng.choice(genre_info['drum_styles'])]
         
         song_parts = []
         section_counts = {}
@@ -868,24 +966,48 @@ class MusicGenerator:
         """Play a sound if the mixer is available"""
         if sound and _is_mixer_available():
             try:
-                channel = pygame.mixer.find_channel(True)
-                if channel:
-                    channel.set_volume(0.0 if self.is_muted else self.volume)
-                    channel.play(sound)
-                    return sound
-            except:
-                pass
+                channel = self.find_channel()
+                channel.set_volume(0.0 if self.is_muted else self.volume)
+                channel.play(sound)
+            except pygame.error:
+                # The mixer was shut down between the check and the play
+                return None
+            return sound
         return None
 
+    def find_channel(self):
+        """Find a free music channel, taking the next one in turn if all are busy"""
+        count = len(self.channels)
+        for offset in range(count):
+            index = (self.next_channel + offset) % count
+            if not self.channels[index].get_busy():
+                break
+        else:
+            index = self.next_channel
+        self.next_channel = (index + 1) % count
+        return self.channels[index]
+
     def play_song(self):
+        """Start playing a new song, posting SONG_END_EVENT once it has finished"""
+        # Let any previous song finish its cleanup so it can't stop the new one
+        if getattr(self, 'song_thread', None) is not None and self.song_thread.is_alive():
+            self.stop_event.set()
+            self.song_thread.join()
+        
+        # Generating a song takes a while, so it is done off the caller's thread
+        self.stop_event = Event()
+        self.song_thread = Thread(target=self._play_song, args=(self.stop_event,), daemon=True)
+        self.song_thread.start()
+
+    def _play_song(self, stop_event):
         """Play a complete song with different sections"""
         try:
             # Choose random genre
-            self.current_genre = random.choice(list(self.genres.keys()))
+            self.current_genre = self.rng.choice(list(self.genres.keys()))
             genre_info = self.genres[self.current_genre]
             
             # Set genre-appropriate tempo
-            self.tempo = random.randint(*genre_info['tempo_range'])
+            self.tempo = self.rng.randint(*genre_info['tempo_range'])
             self.beat_duration = 60.0 / self.tempo
             self.step_duration = self.beat_duration / self.steps_per_beat
             
@@ -902,288 +1024,167 @@ class MusicGenerator:
             song_parts = self.generate_song_structure()
             
             # Pre-generate all sounds for the entire song
-            all_melody_sounds = {}
             for part in song_parts:
-                melody_sounds = []
-                melody_timings = []
-                current_time = 0
+                part['melody_sounds'] = [
+                    self.generate_melody_tone(self.notes[note], duration, genre=self.current_genre)  # Will be cached
+                    if note is not None else None
+                    for note, duration in part['melody']
+                ]
                 
-                for note, duration in part['melody']:
-                    if note is not None:
-                        freq = self.notes[note]
-                        tone = self.generate_melody_tone(freq, duration, genre=self.current_genre)  # Will be cached
-                        melody_sounds.append((tone, duration))
-                        melody_timings.append(current_time)
-                    else:
-                        melody_sounds.append((None, duration))
-                        melody_timings.append(current_time)
-                    current_time += duration
-                    
-                all_melody_sounds[id(part)] = (melody_sounds, melody_timings)
+                # Each note starts when all the notes before it have finished
+                durations = np.fromiter((duration for _, duration in part['melody']),
+                                        dtype=np.float64, count=len(part['melody']))
+                part['melody_timings'] = np.concatenate(([0.0], np.cumsum(durations)[:-1]))
 
-            # Pre-generate harmony sounds for each possible chord
-            harmony_sounds = {}
-            for chord_degree in range(1, 8):
-                root_note = self.scales['major'][chord_degree - 1]
-                chord_notes = self.get_chord_notes(root_note)
-                for freq in chord_notes:
-                    self.generate_harmony_tone(freq, self.beat_duration * 2)  # Cache the sound
+            # Shorter chords for funk/electronic, longer for ambient
+            if self.current_genre in ['funk', 'electronic']:
+                harmony_duration = self.beat_duration
+            else:
+                harmony_duration = self.beat_duration * 2
+            
+            # The root note of each chord in the scale
+            chord_roots = {chord_degree: self.scales['major'][chord_degree - 1]
+                           for chord_degree in range(1, 8)}
+            
+            # Pre-generate harmony sounds for every voicing of each chord the song
+            # uses, exactly as they are played, so chords never synthesize during
+            # playback. Their length follows the tempo, so they are kept for this
+            # song only rather than filling up the shared tone cache
+            harmony_tones = {}
+            song_chords = {chord_degree for part in song_parts for chord_degree in part['progression']}
+            for chord_degree in song_chords:
+                for chord_notes in self.get_chord_voicings(chord_roots[chord_degree]):
+                    for freq in chord_notes:
+                        if freq not in harmony_tones:
+                            harmony_tones[freq] = self.generate_harmony_tone(freq, harmony_duration, amplitude=1536)
 
             # Timing constants
             steps_per_bar = 16
             total_steps = steps_per_bar * self.bars_per_phrase
             step_duration = self.beat_duration / 4
             section_duration = total_steps * step_duration
-
-            # Sound management
-            active_sounds = []
-            current_section_sounds = set()
-            
-            def cleanup_finished_sounds():
-                """Remove finished sounds from active_sounds list"""
-                if not _is_mixer_available():
-                    return
             
-                for sound in active_sounds[:]:
-                    try:
-                        if not pygame.mixer.find_channel(True):
-                            sound.stop()
-                            if sound in active_sounds:
-                                active_sounds.remove(sound)
-                            if sound in current_section_sounds:
-                                current_section_sounds.remove(sound)
-                    except:
-                        # If we can't access the mixer, just clear the lists
-                        active_sounds.clear()
-                        current_section_sounds.clear()
-                        break
-
-            def stop_all_section_sounds():
-                """Stop all sounds from the current section"""
-                for sound in current_section_sounds.copy():
-                    try:
-                        sound.stop()
-                        if sound in active_sounds:
-                            active_sounds.remove(sound)
-                        current_section_sounds.remove(sound)
-                    except:
-                        pass
-                current_section_sounds.clear()
-            
-            def play_sound(sound):
-                """Helper function to play and track sounds"""
-                if sound is not None:
-                    sound = self.play_sound(sound)
-                    if sound:
-                        active_sounds.append(sound)
-                        current_section_sounds.add(sound)
+            # Pre-mix each section's drum pattern into a one-bar sound
+            for part in song_parts:
+                part['drum_bar'] = self.render_drum_bar(part['drums'], step_duration, steps_per_bar)
 
-            # Synchronization events and shared state
-            start_event = Event()
-            stop_event = Event()
-            current_step = 0
-            current_part_index = 0
-            current_part = None
-            current_elapsed = 0.0
-            
-            # Locks for shared state
-            state_lock = Lock()
-            
-            def update_playback_state():
-                """Main timing and state update loop"""
-                nonlocal current_step, current_part_index, current_part, current_elapsed
-                
-                start_time = time.time()
-                section_start_time = start_time
+            last_voicing = None
+            
+            def schedule_section(part):
+                """List the sounds that start on each step of a section"""
+                nonlocal last_voicing
+                steps = [[] for _ in range(total_steps)]
                 
-                while not stop_event.is_set() and current_part_index < len(song_parts):
-                    current_time = time.time()
-                    elapsed_in_section = current_time - section_start_time
-                    
-                    if elapsed_in_section >= section_duration:
-                        stop_all_section_sounds()
-                        current_part_index += 1
-                        if current_part_index < len(song_parts):
-                            print(f"\nPlaying {song_parts[current_part_index]['section']}...")
-                            section_start_time = current_time
-                            with state_lock:
-                                current_part = song_parts[current_part_index]
-                                current_step = 0
-                                current_elapsed = 0.0
-                        else:
-                            print("\nSong finished!")
-                            stop_event.set()
-                            break
-                        continue
-                    
-                    # Update shared state
-                    with state_lock:
-                        current_step = int(elapsed_in_section / step_duration)
-                        current_part = song_parts[current_part_index]
-                        current_elapsed = elapsed_in_section
-                    
-                    # Calculate timing for next step
-                    next_step_time = section_start_time + (current_step * step_duration)
-                    wait_time = next_step_time - current_time
-                    if wait_time > 0:
-                        time.sleep(wait_time)
-                    
-                    cleanup_finished_sounds()
-
-            def play_melody_part():
-                """Handle melody playback"""
-                start_event.wait()
-                last_step = -1
+                # The pre-mixed drums start at the top of every bar
+                for step in range(0, total_steps, steps_per_bar):
+                    steps[step].append(part['drum_bar'])
                 
-                while not stop_event.is_set():
-                    with state_lock:
-                        if current_part is None:
-                            time.sleep(0.01)
-                            continue
-                            
-                        step = current_step
-                        part = current_part
-                        elapsed = current_elapsed
-                        
-                        if step == last_step:
-                            time.sleep(0.001)
-                            continue
-                        
-                        last_step = step
-                        
-                        melody_sounds, melody_timings = all_melody_sounds[id(part)]
-                        for sound, timing in zip(melody_sounds, melody_timings):
-                            if abs(timing - elapsed) < step_duration / 2:
-                                if sound[0] is not None:
-                                    play_sound(sound[0])
-                    time.sleep(0.001)
-
-            def play_chord_part():
-                """Handle chord playback with rhythmic variation"""
-                start_event.wait()
-                last_chord_step = -1
-                last_voicing = None
-                current_pattern = None
-                pattern_duration = 0
+                # Each melody note starts on the step nearest its timing
+                melody_steps = np.rint(part['melody_timings'] / step_duration).astype(int)
+                for tone, step in zip(part['melody_sounds'], melody_steps.tolist()):
+                    if tone is not None and step < total_steps:
+                        steps[step].append(tone)
                 
-                while not stop_event.is_set():
-                    with state_lock:
-                        if current_part is None:
-                            time.sleep(0.01)
-                            continue
-                            
-                        step = current_step
-                        part = current_part
-                        
-                        # Change pattern every 4 bars
+                # Chords follow a rhythm pattern that changes every 4 bars, each
+                # half bar's chord playing on its first step the pattern marks
+                patterns = self.harmony_patterns.get(self.current_genre)
+                if patterns:
+                    progression = part['progression']
+                    last_chord_step = None
+                    for step in range(total_steps):
                         if step % 64 == 0:
-                            try:
-                                current_pattern = random.choice(self.harmony_patterns[self.current_genre])
-                            except:
-                                continue
-                        
-                        # Get current step in pattern
-                        pattern_step = step % 16
+                            current_pattern = self.rng.choice(patterns)
                         
                         if step // 8 == last_chord_step:
-                            time.sleep(0.001)
                             continue
                         
-                        try:
-                            if pattern_step == 0 or current_pattern[pattern_step]:
-                                progression = part['progression']
-                                chord_index = (step // 8) % len(progression)
-                                chord_degree = progression[chord_index]
-                                root_note = self.scales['major'][chord_degree - 1]
-                                
-                                # Choose chord voicing, avoiding the same voicing twice in a row
-                                while True:
-                                    chord_notes = self.get_chord_notes(root_note)
-                                    if chord_notes != last_voicing:
-                                        break
-                                last_voicing = chord_notes
-                                
-                                # Play chord notes with genre-appropriate timing
-                                for freq in chord_notes:
-                                    # Shorter duration for funk/electronic, longer for ambient
-                                    if self.current_genre in ['funk', 'electronic']:
-                                        duration = self.beat_duration
-                                    else:
-                                        duration = self.beat_duration * 2
-                                    tone = self.generate_harmony_tone(freq, duration, amplitude=1536)
-                                    if tone is not None:  # Only play if tone generation succeeded
-                                        play_sound(tone)
-                                
-                                last_chord_step = step // 8
-                        except:
-                            # Handle any errors during chord generation/playback
-                            pass
-                    time.sleep(0.001)
-
-            def play_drum_part():
-                """Handle drum playback"""
-                start_event.wait()
-                last_step = -1
-                
-                while not stop_event.is_set():
-                    with state_lock:
-                        if current_part is None:
-                            time.sleep(0.01)
-                            continue
+                        pattern_step = step % 16
+                        if pattern_step == 0 or current_pattern[pattern_step]:
+                            chord_index = (step // 8) % len(progression)
+                            root_note = chord_roots[progression[chord_index]]
                             
-                        step = current_step
-                        part = current_part
-                        
-                        if step == last_step:
-                            time.sleep(0.001)
-                            continue
-                        
-                        last_step = step
-                        step_in_bar = step % steps_per_bar
-                        
-                        try:
-                            for drum_type, pattern in part['drums'].items():
-                                if pattern[step_in_bar]:
-                                    if drum_type in self.drum_sounds:
-                                        play_sound(self.drum_sounds[drum_type])
-                        except (KeyError, AttributeError):
-                            # Drum sounds might have been cleared during shutdown
-                            pass
-                    time.sleep(0.001)
-
-            # Create and start threads
-            threads = [
-                Thread(target=update_playback_state),
-                Thread(target=play_melody_part),
-                Thread(target=play_chord_part),
-                Thread(target=play_drum_part)
-            ]
-
-            for thread in threads:
-                thread.daemon = True
-                thread.start()
+                            # Choose chord voicing, avoiding the same voicing twice in a row
+                            chord_notes = self.get_chord_notes(root_note, avoid=last_voicing)
+                            last_voicing = chord_notes
+                            
+                            for freq in chord_notes:
+                                tone = harmony_tones[freq]
+                                if tone is not None:  # Only play if tone generation succeeded
+                                    steps[step].append(tone)
+                            
+                            last_chord_step = step // 8
+                
+                return steps
+            
+            def stop_section_sounds():
+                """Cut off whatever the section left playing"""
+                if _is_mixer_available():
+                    try:
+                        for channel in self.channels:
+                            channel.stop()
+                    except pygame.error:
+                        pass  # The mixer was shut down while stopping them
 
             print("\nStarting song...")
-            start_event.set()
-
-            # Wait for song to complete or stop event
-            while not stop_event.is_set():
-                time.sleep(0.1)
+            song_finished = False
+            
+            # Play the song from this one thread, sleeping until each step with
+            # something to start is due; stopping the song wakes it straight away
+            start_time = time.perf_counter()
+            for part_index, part in enumerate(song_parts):
+                if part_index > 0:
+                    print(f"\nPlaying {part['section']}...")
+                section_start = start_time + part_index * section_duration
+                
+                for step, sounds in enumerate(schedule_section(part)):
+                    if not sounds:
+                        continue
+                    delay = section_start + step * step_duration - time.perf_counter()
+                    
+                    # If the thread fell more than a step behind, drop the missed
+                    # steps rather than piling them on top of the next ones
+                    if delay < -step_duration:
+                        continue
+                    if stop_event.wait(max(0.0, delay)):
+                        break
+                    for sound in sounds:
+                        self.play_sound(sound)
+                
+                if stop_event.wait(max(0.0, section_start + section_duration - time.perf_counter())):
+                    break
+                stop_section_sounds()
+            else:
+                print("\nSong finished!")
+                song_finished = True
             
             # Cleanup
-            stop_all_section_sounds()
-            time.sleep(0.5)  # Allow time for cleanup
+            stop_section_sounds()
             
-            # Clear pygame sound channels
-            pygame.mixer.stop()
+            # A stopped song leaves the mixer alone, since the game may be
+            # quitting it; stopping also cuts the pause before the next song short
+            if not song_finished or stop_event.wait(0.5):
+                return
             
-            # Set the volume before playing
-            pygame.mixer.music.set_volume(0.0 if self.is_muted else self.volume)
+            if _is_mixer_available():
+                # Clear pygame sound channels
+                pygame.mixer.stop()
+                
+                # Set the volume before playing
+                pygame.mixer.music.set_volume(0.0 if self.is_muted else self.volume)
+            
+            # Let the game know it can start the next song
+            if pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(SONG_END_EVENT))
             
         except Exception as e:
             print(f"Error in music playback: {e}")
-            # Ensure cleanup happens even if there's an error
-            pygame.mixer.stop()
+            # Ensure cleanup happens even if there's an error, unless the
+            # mixer has already been shut down
+            if _is_mixer_available():
+                try:
+                    pygame.mixer.stop()
+                except pygame.error:
+                    pass
 
     def stop_all_sounds(self):
         """Stop all sounds and cleanup resources"""
@@ -1217,3 +1218,4 @@ class MusicGenerator:
 if __name__ == "__main__":
     music_gen = MusicGenerator()
     music_gen.play_song()
+    music_gen.song_thread.join()
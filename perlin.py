@@ -0,0 +1,87 @@
+import numpy as np
+
+# Gradient directions for each hash value (Perlin's "improved noise" set)
+GRAD2 = np.array([
+    (1, 1), (-1, 1), (1, -1), (-1, -1),
+    (1, 0), (-1, 0), (1, 0), (-1, 0),
+    (0, 1), (0, -1), (0, 1), (0, -1),
+    (1, 0), (-1, 0), (0, -1), (0, 1),
+], dtype=np.float32)
+
+# Ken Perlin's reference permutation, doubled so that lookups can add offsets
+_PERMUTATION = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+    247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+    57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+    74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+    52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+    207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+    119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+    129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+    218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+    81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+    184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+    222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+PERM = np.array(_PERMUTATION * 2, dtype=np.intp)
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+def _grad2(hash_value, x, y):
+    """Dot product of the offset (x, y) with the gradient picked by hash_value"""
+    grad = GRAD2[hash_value & 15]
+    return x * grad[..., 0] + y * grad[..., 1]
+
+def _noise2(x, y, repeatx, repeaty, base):
+    """Single octave of tileable 2D Perlin noise over arrays of coordinates"""
+    i = np.floor(np.fmod(x, repeatx)).astype(np.intp)
+    j = np.floor(np.fmod(y, repeaty)).astype(np.intp)
+    ii = np.fmod(i + 1, repeatx).astype(np.intp)
+    jj = np.fmod(j + 1, repeaty).astype(np.intp)
+    i = (i & 255) + base
+    j = (j & 255) + base
+    ii = (ii & 255) + base
+    jj = (jj & 255) + base
+    
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    fx = x * x * x * (x * (x * 6 - 15) + 10)
+    fy = y * y * y * (y * (y * 6 - 15) + 10)
+    
+    # Wrap every lookup into the table so large bases stay in range
+    A = PERM[i & 511]
+    AA = PERM[(A + j) & 511]
+    AB = PERM[(A + jj) & 511]
+    B = PERM[ii & 511]
+    BA = PERM[(B + j) & 511]
+    BB = PERM[(B + jj) & 511]
+    
+    return _lerp(fy, _lerp(fx, _grad2(PERM[AA], x, y),
+                               _grad2(PERM[BA], x - 1, y)),
+                     _lerp(fx, _grad2(PERM[AB], x, y - 1),
+                               _grad2(PERM[BB], x - 1, y - 1)))
+
+def pnoise2(x, y, octaves=1, persistence=0.5, lacunarity=2.0,
+            repeatx=1024, repeaty=1024, base=0):
+    """Vectorized equivalent of noise.pnoise2; x, y and base may be arrays"""
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    base = np.asarray(base, dtype=np.intp)
+    
+    freq = 1.0
+    amp = 1.0
+    total = 0.0
+    max_amp = 0.0
+    for _ in range(octaves):
+        total = total + _noise2(x * np.float32(freq), y * np.float32(freq),
+                                np.float32(repeatx * freq), np.float32(repeaty * freq),
+                                base) * np.float32(amp)
+        max_amp += amp
+        freq *= lacunarity
+        amp *= persistence
+    return total / np.float32(max_amp)
@@ -46,30 +46,30 @@ class SoundEffects:
         import numpy as np
         
         sample_rate = 44100
-        t = np.linspace(0, duration, int(sample_rate * duration), False)
+        t = np.linspace(0, duration, int(sample_rate * duration), False, dtype=np.float32)
         
         if isinstance(frequency, (int, float)):
             frequency = [frequency]
         
-        # Generate the waveform (sum of frequencies)
-        waveform = np.zeros_like(t)
-        for freq in frequency:
-            waveform += amplitude * np.sin(2 * np.pi * freq * t)
+        # Generate the waveform (sum of frequencies), taking every frequency's
+        # sines in one array with a row per frequency; float32 is plenty for
+        # 16-bit samples
+        phases = np.multiply.outer(2 * np.pi * np.asarray(frequency, dtype=np.float32), t)
+        np.sin(phases, out=phases)
+        waveform = phases.sum(axis=0)
         
-        # Normalize
-        waveform = waveform / len(frequency)
+        # Scale and normalize
+        waveform *= amplitude / len(frequency)
         
-        # Apply a simple envelope to avoid clicks
-        envelope = np.ones_like(t)
+        # Apply a simple envelope to avoid clicks, fading only the ends in place
         attack = int(0.005 * sample_rate)
         release = int(0.005 * sample_rate)
-        envelope[:attack] = np.linspace(0, 1, attack)
-        envelope[-release:] = np.linspace(1, 0, release)
-        waveform = waveform * envelope
+        waveform[:attack] *= np.linspace(0, 1, attack, dtype=np.float32)
+        waveform[-release:] *= np.linspace(1, 0, release, dtype=np.float32)
         
         # Convert to 16-bit integer samples
-        waveform = np.int16(waveform * 32767)
-        return waveform.tobytes()
+        waveform *= 32767
+        return waveform.astype(np.int16).tobytes()
 
     def set_volume(self, volume):
         """Set volume for all sound effects"""